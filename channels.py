@@ -0,0 +1,78 @@
+# channels.py
+import os
+
+
+def _ids(value):
+    return {int(part) for part in value.replace(" ", "").split(",") if part}
+
+
+# Channel IDs win over names; names are the fallback for servers that were
+# never configured. Several IDs may be listed (one per guild).
+LOG_CHANNEL_IDS = _ids(os.getenv("LOG_CHANNEL_IDS", ""))
+LOG_CHANNEL_NAME = os.getenv("LOG_CHANNEL_NAME", "logs")
+MEMORY_CHANNEL_IDS = _ids(os.getenv("MEMORY_CHANNEL_IDS", ""))
+MEMORY_CHANNEL_NAME = os.getenv("MEMORY_CHANNEL_NAME", "")
+
+LOGS = "logs"
+MEMORY = "memory"
+
+
+class ChannelIndex:
+    """Per-guild map of role ("logs", "memory") -> channel id.
+
+    A guild is scanned once, on its first lookup, and after that lookups are
+    a dict hit plus `guild.get_channel()`. The channel listeners drop a
+    guild's entry whenever a channel that holds or could hold a role is
+    created, renamed or deleted, so the next lookup rescans it. With no
+    memory channel configured the memory feed shares the log channel.
+    """
+
+    def __init__(self, ids=None, names=None):
+        self.ids = ids or {LOGS: LOG_CHANNEL_IDS, MEMORY: MEMORY_CHANNEL_IDS}
+        self.names = names or {LOGS: LOG_CHANNEL_NAME, MEMORY: MEMORY_CHANNEL_NAME}
+        self._guilds = {}
+        self.stats = {"scans": 0, "invalidations": 0}
+
+    def get(self, guild, role=LOGS):
+        roles = self._guilds.get(guild.id)
+        if roles is None:
+            roles = self._guilds[guild.id] = self._scan(guild)
+        channel_id = roles.get(role)
+        if channel_id is None and role == MEMORY:
+            channel_id = roles.get(LOGS)
+        return guild.get_channel(channel_id) if channel_id is not None else None
+
+    def is_role(self, channel, role=LOGS):
+        guild = getattr(channel, "guild", None)
+        if guild is None:
+            return False
+        found = self.get(guild, role)
+        return found is not None and found.id == channel.id
+
+    def _scan(self, guild):
+        self.stats["scans"] += 1
+        by_id, by_name = {}, {}
+        for channel in guild.text_channels:
+            for role in self.ids:
+                if channel.id in self.ids[role]:
+                    by_id.setdefault(role, channel.id)
+                elif self.names[role] and channel.name == self.names[role]:
+                    by_name.setdefault(role, channel.id)
+        return {**by_name, **by_id}
+
+    def _relevant(self, channel):
+        roles = self._guilds.get(channel.guild.id)
+        if roles is None:
+            return False
+        return (channel.id in roles.values()
+                or any(channel.id in ids for ids in self.ids.values())
+                or (channel.name and channel.name in self.names.values()))
+
+    def channel_changed(self, channel):
+        """Call from on_guild_channel_create/delete and with both sides of an update."""
+        if self._relevant(channel):
+            self.forget(channel.guild.id)
+            self.stats["invalidations"] += 1
+
+    def forget(self, guild_id):
+        self._guilds.pop(guild_id, None)
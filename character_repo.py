@@ -0,0 +1,252 @@
+# character_repo.py
+import json
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from db import connect
+
+STAT_NAMES = ("strength", "dexterity", "intelligence")
+DEFAULT_STATS = dict.fromkeys(STAT_NAMES, 10)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+"""
+# Guilds whose #logs have been scanned for legacy character logs.
+IMPORTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS character_imports (
+    guild_id INTEGER PRIMARY KEY,
+    imported_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+PACK_VERSION = 1
+_header = struct.Struct("<BB")      # version, number of stats
+_length = struct.Struct("<I")
+_count = struct.Struct("<H")
+
+
+class StatBlock(Mapping):
+    """Ability scores as one small int array in STAT_NAMES order.
+
+    Reads like the old `{"strength": 10, ...}` dict, but a character carries
+    six bytes instead of a dict with its own copies of the keys.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values=None):
+        if values is None:
+            self.values = array("h", DEFAULT_STATS.values())
+        elif isinstance(values, Mapping):
+            self.values = array("h", (values.get(name, DEFAULT_STATS[name]) for name in STAT_NAMES))
+        else:
+            self.values = array("h", values)
+
+    def __getitem__(self, name):
+        try:
+            return self.values[STAT_NAMES.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        try:
+            self.values[STAT_NAMES.index(name)] = value
+        except ValueError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        return iter(STAT_NAMES)
+
+    def __len__(self):
+        return len(STAT_NAMES)
+
+    def __repr__(self):
+        return f"StatBlock({self.as_dict()})"
+
+    def as_dict(self):
+        return dict(zip(STAT_NAMES, self.values))
+
+
+def _pack_str(parts, text):
+    data = text.encode("utf-8")
+    parts.append(_length.pack(len(data)))
+    parts.append(data)
+
+
+def _unpack_str(buf, offset):
+    (size,) = _length.unpack_from(buf, offset)
+    offset += _length.size
+    return str(buf[offset:offset + size], "utf-8"), offset + size
+
+
+@dataclass(slots=True)
+class Character:
+    name: str
+    race: str
+    char_class: str
+    stats: StatBlock = field(default_factory=StatBlock)
+    passives: list = field(default_factory=list)
+    personality: str = ""
+    inventory: list = field(default_factory=list)
+    skills: list = field(default_factory=list)
+
+    def __post_init__(self):
+        # A shard holds thousands of "Elf"s and "Rogue"s; keep one copy of each.
+        self.race = sys.intern(self.race)
+        self.char_class = sys.intern(self.char_class)
+        if not isinstance(self.stats, StatBlock):
+            self.stats = StatBlock(self.stats)
+
+    def as_dict(self):
+        """Plain JSON-ready form; `Character(**char.as_dict())` round-trips."""
+        return {
+            "name": self.name, "race": self.race, "char_class": self.char_class,
+            "stats": self.stats.as_dict(), "passives": list(self.passives), "personality": self.personality,
+            "inventory": list(self.inventory), "skills": list(self.skills),
+        }
+
+    def pack(self):
+        stats = self.stats.values
+        if sys.byteorder != "little":
+            stats = array("h", stats)
+            stats.byteswap()
+        parts = [_header.pack(PACK_VERSION, len(stats)), stats.tobytes()]
+        for text in (self.name, self.race, self.char_class, self.personality):
+            _pack_str(parts, text)
+        for items in (self.passives, self.inventory, self.skills):
+            parts.append(_count.pack(len(items)))
+            for item in items:
+                _pack_str(parts, item)
+        return b"".join(parts)
+
+    @classmethod
+    def unpack(cls, data):
+        buf = memoryview(data)
+        version, n_stats = _header.unpack_from(buf, 0)
+        if version != PACK_VERSION:
+            raise ValueError(f"unknown character format {version}")
+        offset = _header.size
+        stats = array("h")
+        stats.frombytes(buf[offset:offset + 2 * n_stats])
+        if sys.byteorder != "little":
+            stats.byteswap()
+        offset += 2 * n_stats
+        strings = []
+        for _ in range(4):
+            text, offset = _unpack_str(buf, offset)
+            strings.append(text)
+        lists = []
+        for _ in range(3):
+            (count,) = _count.unpack_from(buf, offset)
+            offset += _count.size
+            items = []
+            for _ in range(count):
+                item, offset = _unpack_str(buf, offset)
+                items.append(item)
+            lists.append(items)
+        name, race, char_class, personality = strings
+        passives, inventory, skills = lists
+        return cls(name, race, char_class, StatBlock(stats), passives, personality, inventory, skills)
+
+    def log_entry(self, user_id):
+        """The `[CHARACTER LOG]` text mirrored to #logs; `parse_character_log` reads it back."""
+        return (
+            "[CHARACTER LOG]\n"
+            f"UserID: {user_id}\n"
+            f"Name: {self.name}\n"
+            f"Race: {self.race}\n"
+            f"Class: {self.char_class}\n"
+            f"Stats: {json.dumps(self.stats.as_dict())}\n"
+            f"Passives: {json.dumps(self.passives)}\n"
+            f"Personality: {self.personality}"
+        )
+
+
+class CharacterRepository:
+    """Characters per (guild, user), stored in the bot's SQLite database.
+
+    Each character is one packed BLOB (see `Character.pack`), so a read is a
+    primary-key lookup plus one unpack and a write is one statement or one
+    short transaction. Callables in `listeners` are called with
+    (guild_id, user_id) after every write.
+    """
+
+    def __init__(self, path=None):
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA + IMPORTS_SCHEMA)
+        self.listeners = []
+
+    def _changed(self, guild_id, user_id):
+        for listener in self.listeners:
+            listener(guild_id, user_id)
+
+    def get(self, guild_id, user_id):
+        row = self.conn.execute(
+            "SELECT data FROM characters WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+        ).fetchone()
+        return Character.unpack(row[0]) if row else None
+
+    def save(self, guild_id, user_id, character):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO characters (guild_id, user_id, data) VALUES (?, ?, ?)",
+            (guild_id, user_id, character.pack())
+        )
+        self._changed(guild_id, user_id)
+
+    def delete(self, guild_id, user_id):
+        cur = self.conn.execute("DELETE FROM characters WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+        self._changed(guild_id, user_id)
+        return cur.rowcount > 0
+
+    def add_item(self, guild_id, user_id, item):
+        """Append to a character's inventory; False if there is no character."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            char = self.get(guild_id, user_id)
+            if char is not None:
+                char.inventory.append(item)
+                self.conn.execute(
+                    "UPDATE characters SET data = ?, updated_at = datetime('now') WHERE guild_id = ? AND user_id = ?",
+                    (char.pack(), guild_id, user_id)
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self._changed(guild_id, user_id)
+        return char is not None
+
+    def is_imported(self, guild_id):
+        """True once a guild's legacy #logs have been imported, or it already has characters."""
+        return self.conn.execute(
+            "SELECT 1 FROM character_imports WHERE guild_id = ? "
+            "UNION ALL SELECT 1 FROM characters WHERE guild_id = ? LIMIT 1",
+            (guild_id, guild_id)
+        ).fetchone() is not None
+
+    def mark_imported(self, guild_id):
+        self.conn.execute("INSERT OR IGNORE INTO character_imports (guild_id) VALUES (?)", (guild_id,))
+
+    def close(self):
+        self.conn.close()
+
+
+def parse_character_log(content):
+    """Parse a legacy `[CHARACTER LOG]` message into (user_id, Character) for one-off imports."""
+    fields = {}
+    for line in content.splitlines()[1:]:
+        key, sep, value = line.partition(": ")
+        if sep:
+            fields[key] = value.strip()
+    return int(fields["UserID"]), Character(
+        fields["Name"], fields["Race"], fields["Class"],
+        json.loads(fields["Stats"]), json.loads(fields["Passives"]), fields.get("Personality", "")
+    )
@@ -0,0 +1,70 @@
+# context_window.py
+import os
+import re
+
+# Context sizes of the models we route to; anything unknown gets the smallest.
+MODEL_CONTEXT = {
+    "mistralai/mistral-7b-instruct": 32768,
+}
+DEFAULT_CONTEXT = 8192
+REPLY_RESERVE = int(os.getenv("CONTEXT_REPLY_RESERVE", "1024"))
+# Spend/latency cap on top of the model limit; most turns fit well inside it.
+CONTEXT_BUDGET = int(os.getenv("CONTEXT_BUDGET", "4096"))
+MESSAGE_OVERHEAD = 4
+
+_pieces = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+
+
+def count_tokens(text):
+    """Approximate BPE token count without a tokenizer download.
+
+    Words are split the way BPE pre-tokenizers do; a word costs one token per
+    ~4 letters, digits and punctuation one each. Tends to overestimate
+    slightly, which is the safe side for a budget.
+    """
+    total = 0
+    for piece in _pieces.findall(text):
+        total += (len(piece) + 3) // 4
+    return total
+
+
+def message_tokens(message):
+    tokens = getattr(message, "tokens", None)
+    return tokens if tokens is not None else count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def budget_for(model, budget=None):
+    limit = MODEL_CONTEXT.get(model, DEFAULT_CONTEXT) - REPLY_RESERVE
+    return min(limit, budget or CONTEXT_BUDGET)
+
+
+def build_context(system_prompt, memory, user_message, model, budget=None, summary=""):
+    """Assemble the completion messages within the model's token budget.
+
+    The system prompt, the "story so far" summary (if any) and the new user
+    message (which carries the character description) are always kept.
+    Memory turns are user/assistant pairs and are added newest first until
+    the budget runs out; older turns are dropped. `system_prompt` may also be
+    a ready-made message, e.g. a precomputed prompt prefix.
+    """
+    if isinstance(system_prompt, str):
+        system_prompt = {"role": "system", "content": system_prompt}
+    pinned = [system_prompt]
+    if summary:
+        pinned.append({"role": "system", "content": f"Story so far: {summary}"})
+    user = {"role": "user", "content": user_message}
+    remaining = budget_for(model, budget) - sum(message_tokens(m) for m in pinned) - message_tokens(user)
+
+    kept = []
+    i = len(memory)
+    while i > 0:
+        # Step back over one turn, keeping a prompt and its reply together.
+        start = i - 2 if i >= 2 and memory[i - 2]["role"] == "user" else i - 1
+        cost = sum(message_tokens(m) for m in memory[start:i])
+        if cost > remaining:
+            break
+        remaining -= cost
+        kept.append(memory[start:i])
+        i = start
+
+    return pinned + [m for turn in reversed(kept) for m in turn] + [user]
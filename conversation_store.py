@@ -0,0 +1,116 @@
+# conversation_store.py
+from db import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    quest_id INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    reply TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (guild_id, channel_id, quest_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS quest_counters (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    last_quest_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, channel_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    through_quest_id INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    PRIMARY KEY (guild_id, channel_id)
+) WITHOUT ROWID;
+"""
+
+
+class ConversationStore:
+    """Turn history and quest counters per (guild, channel).
+
+    Replaces rebuilding memory from `#logs` on every `!askdm`: reads are a
+    single primary-key range scan and each reply is one short transaction.
+    """
+
+    def __init__(self, path=None):
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def recent_turns(self, guild_id, channel_id, limit=50, after=0):
+        """Return the last `limit` turns past quest `after` as (quest_id, prompt, reply), oldest first."""
+        rows = self.conn.execute(
+            "SELECT quest_id, prompt, reply FROM turns WHERE guild_id = ? AND channel_id = ? AND quest_id > ? "
+            "ORDER BY quest_id DESC LIMIT ?",
+            (guild_id, channel_id, after, limit)
+        ).fetchall()
+        rows.reverse()
+        return rows
+
+    def count_turns(self, guild_id, channel_id, after=0):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM turns WHERE guild_id = ? AND channel_id = ? AND quest_id > ?",
+            (guild_id, channel_id, after)
+        ).fetchone()[0]
+
+    def summary(self, guild_id, channel_id):
+        """Return (through_quest_id, summary) for the channel; (0, "") if none yet."""
+        row = self.conn.execute(
+            "SELECT through_quest_id, summary FROM summaries WHERE guild_id = ? AND channel_id = ?",
+            (guild_id, channel_id)
+        ).fetchone()
+        return row or (0, "")
+
+    def set_summary(self, guild_id, channel_id, through_quest_id, summary):
+        self.conn.execute(
+            "INSERT INTO summaries (guild_id, channel_id, through_quest_id, summary) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (guild_id, channel_id) DO UPDATE SET "
+            "through_quest_id = excluded.through_quest_id, summary = excluded.summary",
+            (guild_id, channel_id, through_quest_id, summary)
+        )
+
+    def next_quest_id(self, guild_id, channel_id):
+        row = self.conn.execute(
+            "SELECT last_quest_id FROM quest_counters WHERE guild_id = ? AND channel_id = ?",
+            (guild_id, channel_id)
+        ).fetchone()
+        return (row[0] if row else 0) + 1
+
+    def add_turn(self, guild_id, channel_id, prompt, reply):
+        """Record a turn under the next quest id and return that id."""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute(
+                "INSERT INTO quest_counters (guild_id, channel_id, last_quest_id) VALUES (?, ?, 1) "
+                "ON CONFLICT (guild_id, channel_id) DO UPDATE SET last_quest_id = last_quest_id + 1",
+                (guild_id, channel_id)
+            )
+            quest_id = self.conn.execute(
+                "SELECT last_quest_id FROM quest_counters WHERE guild_id = ? AND channel_id = ?",
+                (guild_id, channel_id)
+            ).fetchone()[0]
+            self.conn.execute(
+                "INSERT INTO turns (guild_id, channel_id, quest_id, prompt, reply) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, channel_id, quest_id, prompt, reply)
+            )
+        return quest_id
+
+    def clear(self, guild_id, channel_id):
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM turns WHERE guild_id = ? AND channel_id = ?", (guild_id, channel_id))
+            self.conn.execute("DELETE FROM quest_counters WHERE guild_id = ? AND channel_id = ?", (guild_id, channel_id))
+            self.conn.execute("DELETE FROM summaries WHERE guild_id = ? AND channel_id = ?", (guild_id, channel_id))
+
+    def close(self):
+        self.conn.close()
+
+
+def memory_messages(turns):
+    """Expand stored turns into chat messages for the completion request."""
+    messages = []
+    for _, prompt, reply in turns:
+        messages.append({"role": "user", "content": prompt})
+        messages.append({"role": "assistant", "content": reply})
+    return messages
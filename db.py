@@ -0,0 +1,19 @@
+# db.py
+import os
+import sqlite3
+
+DB_PATH = os.getenv("RIFT_DB_PATH", "riftdm.db")
+
+
+def connect(path=None):
+    """Open the bot's embedded database in WAL mode.
+
+    WAL lets readers keep going while a reply is being written, and
+    synchronous=NORMAL is durable across process crashes, which is all a chat
+    log needs.
+    """
+    conn = sqlite3.connect(path or DB_PATH, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
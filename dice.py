@@ -0,0 +1,407 @@
+# dice.py
+import heapq
+import itertools
+import math
+import random
+import re
+from functools import lru_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Limits for the whole formula, so `1d100000000` or `100000d6+100000d6+...` can't stall the bot.
+MAX_DICE = 100_000
+MAX_SIDES = 10_000
+MAX_EXPLOSIONS = 100
+# Pools at least this big are rolled in one numpy call when numpy is available.
+BULK_THRESHOLD = 64
+# Exact distributions are pure Python and about quadratic in the number of
+# outcomes (dice × sides), keep/drop pools much worse; refuse anything that
+# would take more than a fraction of a second.
+MAX_EXACT_OUTCOMES = 2000
+MAX_EXACT_KEEP_OUTCOMES = 200
+# askdm's judgment bands: (name, lowest total, highest total); None is open-ended.
+JUDGMENT_BANDS = (("negative", None, 10), ("average", 11, 17), ("positive", 18, None))
+
+_named_dice = {}
+_np_rng = numpy.random.default_rng() if numpy is not None else None
+
+_term = re.compile(r"""
+    (?P<adv>adv|dis)
+  | (?P<count>\d*)d(?P<sides>\d+|%|f|\[\w+\])(?P<mods>(?:k[hl]?\d+|d[hl]\d+|!\d*)*)
+  | (?P<const>\d+)
+""", re.X)
+_mod = re.compile(r"(k[hl]?|d[hl]|!)(\d*)")
+
+
+class DiceError(ValueError):
+    """Raised for a formula that does not parse or asks for too many dice."""
+
+
+class Constant:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def roll(self, rng):
+        return self.value
+
+    def distribution(self):
+        return self.value, [1.0]
+
+
+class Dice:
+    """`count` dice with the given faces, optionally weighted, kept/dropped or exploding.
+
+    A plain die (`faces` is a range, no weights) is kept as its lowest and
+    highest face and rolled with `randrange`; only named dice hold a face list.
+    """
+
+    __slots__ = ("count", "lo", "hi", "faces", "cum_weights", "keep_high", "keep", "explode")
+
+    def __init__(self, count, faces, weights=None, keep_high=True, keep=None, explode=None):
+        self.count = count
+        if isinstance(faces, range) and faces.step == 1 and not weights:
+            self.lo, self.hi, self.faces = faces.start, faces.stop - 1, None
+        else:
+            self.faces = tuple(faces)
+            self.lo, self.hi = min(self.faces), max(self.faces)
+        self.cum_weights = list(itertools.accumulate(weights)) if weights else None
+        self.keep_high = keep_high
+        self.keep = keep
+        self.explode = explode
+
+    def _draw(self, rng, count):
+        if self.faces is not None:
+            return rng.choices(self.faces, cum_weights=self.cum_weights, k=count)
+        if rng is random and _np_rng is not None and count >= BULK_THRESHOLD:
+            return _np_rng.integers(self.lo, self.hi + 1, size=count).tolist()
+        randrange, lo, stop = rng.randrange, self.lo, self.hi + 1
+        return [randrange(lo, stop) for _ in range(count)]
+
+    def roll(self, rng):
+        if self.explode is None and self.keep is None:
+            if self.faces is None and rng is random and _np_rng is not None and self.count >= BULK_THRESHOLD:
+                return int(_np_rng.integers(self.lo, self.hi + 1, size=self.count).sum())
+            return sum(self._draw(rng, self.count))
+
+        rolls = self._draw(rng, self.count)
+        if self.explode is not None:
+            rolls = self._explode(rng, rolls)
+        if self.keep is not None:
+            pick = heapq.nlargest if self.keep_high else heapq.nsmallest
+            rolls = pick(self.keep, rolls)
+        return sum(rolls)
+
+    def distribution(self):
+        limit = MAX_EXACT_OUTCOMES if self.keep is None else MAX_EXACT_KEEP_OUTCOMES
+        _check_outcomes(self.count * (self.hi - self.lo + 1), limit)
+        die = self._die_distribution()
+        _check_outcomes(self.count * len(die[1]), limit)
+        if self.keep is None:
+            return _power(die, self.count)
+        return _keep_distribution(die, self.count, self.keep, self.keep_high)
+
+    def _die_distribution(self):
+        lo, hi = self.lo, self.hi
+        if self.faces is None:
+            probs = [1 / (hi - lo + 1)] * (hi - lo + 1)
+        else:
+            probs = [0.0] * (hi - lo + 1)
+            weights = _weights(self.cum_weights) if self.cum_weights else [1] * len(self.faces)
+            total = sum(weights)
+            for face, weight in zip(self.faces, weights):
+                probs[face - lo] += weight / total
+        if self.explode is None:
+            return lo, probs
+        # Faces below the threshold end the chain; the rest add another roll.
+        cut = max(0, min(len(probs), self.explode - lo))
+        stop = (lo, probs[:cut] or [0.0])
+        go = (lo + cut, probs[cut:])
+        result = stop
+        chain = go
+        for _ in range(MAX_EXPLOSIONS):
+            if sum(chain[1]) < 1e-12:
+                break
+            _check_outcomes(len(chain[1]) + len(go[1]) - 1, MAX_EXACT_OUTCOMES)
+            result = _add(result, _convolve(chain, stop))
+            chain = _convolve(chain, go)
+        return result
+
+    def _explode(self, rng, rolls):
+        # Each die that meets the threshold adds another roll of the same die.
+        totals = list(rolls)
+        live = [i for i, r in enumerate(rolls) if r >= self.explode]
+        for _ in range(MAX_EXPLOSIONS):
+            if not live:
+                break
+            extra = self._draw(rng, len(live))
+            for i, r in zip(live, extra):
+                totals[i] += r
+            live = [i for i, r in zip(live, extra) if r >= self.explode]
+        return totals
+
+
+class Sum:
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def roll(self, rng):
+        return sum(sign * term.roll(rng) for sign, term in self.terms)
+
+    def distribution(self):
+        # Every term spans at least this much; fail before computing any of them.
+        _check_outcomes(sum(t.count * (t.hi - t.lo) for _, t in self.terms if isinstance(t, Dice)) + 1,
+                        MAX_EXACT_OUTCOMES)
+        result = (0, [1.0])
+        for sign, term in self.terms:
+            dist = term.distribution()
+            if sign < 0:
+                lo, probs = dist
+                dist = (-(lo + len(probs) - 1), probs[::-1])
+            _check_outcomes(len(result[1]) + len(dist[1]) - 1, MAX_EXACT_OUTCOMES)
+            result = _convolve(result, dist)
+        return result
+
+
+def _check_outcomes(outcomes, limit):
+    if outcomes > limit:
+        raise DiceError(f"too many outcomes for an exact distribution (max {limit} dice × sides)")
+
+
+def _weights(cum_weights):
+    return [b - a for a, b in zip([0] + cum_weights[:-1], cum_weights)]
+
+
+def _convolve(a, b):
+    """Distribution of the sum of two independent (offset, probabilities) variables."""
+    (alo, ap), (blo, bp) = a, b
+    out = [0.0] * (len(ap) + len(bp) - 1)
+    for i, p in enumerate(ap):
+        if p:
+            for j, q in enumerate(bp):
+                out[i + j] += p * q
+    return alo + blo, out
+
+
+def _add(a, b):
+    """Pointwise sum of two partial distributions (mixture, not convolution)."""
+    lo = min(a[0], b[0])
+    hi = max(a[0] + len(a[1]), b[0] + len(b[1]))
+    out = [0.0] * (hi - lo)
+    for start, probs in (a, b):
+        for i, p in enumerate(probs):
+            out[start - lo + i] += p
+    return lo, out
+
+
+def _power(die, count):
+    # Exponentiation by squaring: log2(count) convolutions instead of count.
+    result = (0, [1.0])
+    while count:
+        if count & 1:
+            result = _convolve(result, die)
+        count >>= 1
+        if count:
+            die = _convolve(die, die)
+    return result
+
+
+def _keep_distribution(die, count, keep, keep_high):
+    """Exact distribution of the sum of the `keep` highest (or lowest) of `count` dice.
+
+    Walks the die's values from the kept end, deciding how many of the dice
+    show each value; the multinomial weight is accumulated as p**c / c! and
+    multiplied by count! at the end.
+    """
+    lo, probs = die
+    values = [(lo + i, p) for i, p in enumerate(probs) if p]
+    if keep_high:
+        values.reverse()
+    # state: (dice assigned so far, kept sum) -> weight
+    states = {(0, 0): 1.0}
+    for value, p in values:
+        step = {}
+        for (assigned, total), weight in states.items():
+            term = weight
+            for c in range(count - assigned + 1):
+                if c:
+                    term *= p / c
+                kept = max(0, min(c, keep - assigned))
+                key = (assigned + c, total + kept * value)
+                step[key] = step.get(key, 0.0) + term
+        states = step
+    scale = math.factorial(count)
+    sums = {}
+    for (assigned, total), weight in states.items():
+        if assigned == count:
+            sums[total] = sums.get(total, 0.0) + weight * scale
+    lo = min(sums)
+    out = [0.0] * (max(sums) - lo + 1)
+    for total, p in sums.items():
+        out[total - lo] = p
+    return lo, out
+
+
+def register_die(name, faces, weights=None):
+    """Make `d[name]` roll the given faces, e.g. a d20 biased toward low results."""
+    faces = tuple(faces)
+    if weights is not None and len(weights) != len(faces):
+        raise DiceError(f"die [{name}] has {len(faces)} faces but {len(weights)} weights")
+    _named_dice[name.lower()] = (faces, tuple(weights) if weights else None)
+    compile_formula.cache_clear()
+    distribution.cache_clear()
+
+
+def _bounded(digits, limit, what):
+    # Check the length first: int() refuses strings of more than a few thousand digits.
+    if len(digits) > len(str(limit)) or int(digits) > limit:
+        raise DiceError(f"{what} is too big (max {limit})")
+    return int(digits)
+
+
+def _dice_term(match):
+    count = _bounded(match["count"] or "1", MAX_DICE, "dice count")
+    sides = match["sides"]
+    weights = None
+    if sides == "%":
+        faces = range(1, 101)
+    elif sides == "f":
+        faces = range(-1, 2)
+    elif sides.startswith("["):
+        try:
+            faces, weights = _named_dice[sides[1:-1]]
+        except KeyError:
+            raise DiceError(f"unknown die {sides}")
+    else:
+        faces = range(1, _bounded(sides, MAX_SIDES, "number of sides") + 1)
+    if not faces:
+        raise DiceError(f"can't roll {count}d{sides}")
+
+    keep_high, keep, explode = True, None, None
+    for op, num in _mod.findall(match["mods"]):
+        if op == "!":
+            explode = _bounded(num, MAX_SIDES, "exploding threshold") if num else max(faces)
+            if explode <= min(faces):
+                raise DiceError("exploding threshold must be above the lowest face")
+        elif not num:
+            raise DiceError(f"'{op}' needs a number")
+        elif op in ("k", "kh"):
+            keep_high, keep = True, _bounded(num, MAX_DICE, "dice count")
+        elif op == "kl":
+            keep_high, keep = False, _bounded(num, MAX_DICE, "dice count")
+        elif op == "dh":
+            keep_high, keep = False, count - _bounded(num, MAX_DICE, "dice count")
+        else:  # dl
+            keep_high, keep = True, count - _bounded(num, MAX_DICE, "dice count")
+    if keep is not None:
+        keep = max(0, min(keep, count))
+    return Dice(count, faces, weights, keep_high, keep, explode)
+
+
+@lru_cache(maxsize=1024)
+def compile_formula(formula):
+    """Parse a dice formula once into a reusable tree.
+
+    Supports `NdS`, `d%`, `dF`, registered dice `d[name]`, keep/drop
+    (`4d6kh3`, `4d6k3`, `2d20kl1`, `4d6dl1`, `4d6dh1`), exploding dice
+    (`3d6!`, `3d6!5`), `adv`/`dis` for 2d20 keep highest/lowest, and any
+    sum of those with integer constants (`1d20+1d4-1`).
+    """
+    text = "".join(formula.lower().split())
+    if not text:
+        raise DiceError("empty formula")
+    terms = []
+    dice = 0
+    pos = 0
+    sign = 1
+    while True:
+        if pos < len(text) and text[pos] in "+-":
+            sign = -1 if text[pos] == "-" else 1
+            pos += 1
+        match = _term.match(text, pos)
+        if not match:
+            raise DiceError(f"can't read `{formula}` at `{text[pos:] or 'end'}`")
+        if match["adv"]:
+            term = Dice(2, range(1, 21), keep_high=match["adv"] == "adv", keep=1)
+        elif match["const"]:
+            term = Constant(int(match["const"]))
+        else:
+            term = _dice_term(match)
+        if isinstance(term, Dice):
+            dice += term.count
+            if dice > MAX_DICE:
+                raise DiceError(f"too many dice (max {MAX_DICE} in one formula)")
+        terms.append((sign, term))
+        pos = match.end()
+        if pos == len(text):
+            break
+        if text[pos] not in "+-":
+            raise DiceError(f"can't read `{formula}` at `{text[pos:]}`")
+    return terms[0][1] if len(terms) == 1 and terms[0][0] == 1 else Sum(terms)
+
+
+def roll(formula, rng=random):
+    """Roll a formula and return the total."""
+    return compile_formula(formula).roll(rng)
+
+
+def judgment(total, bands=JUDGMENT_BANDS):
+    for name, lo, hi in bands:
+        if (lo is None or total >= lo) and (hi is None or total <= hi):
+            return name
+    return None
+
+
+class Distribution:
+    """Exact outcome distribution of a formula (see `distribution()`)."""
+
+    __slots__ = ("lo", "probs")
+
+    def __init__(self, lo, probs):
+        self.lo = lo
+        self.probs = tuple(probs)
+
+    @property
+    def hi(self):
+        return self.lo + len(self.probs) - 1
+
+    def pmf(self):
+        return {self.lo + i: p for i, p in enumerate(self.probs) if p}
+
+    def cdf(self):
+        out = {}
+        running = 0.0
+        for i, p in enumerate(self.probs):
+            running += p
+            if p:
+                out[self.lo + i] = min(running, 1.0)
+        return out
+
+    def between(self, lo=None, hi=None):
+        """P(lo <= total <= hi); either bound may be None."""
+        start = 0 if lo is None else max(0, lo - self.lo)
+        stop = len(self.probs) if hi is None else max(0, hi - self.lo + 1)
+        return sum(self.probs[start:stop])
+
+    def mean(self):
+        return sum((self.lo + i) * p for i, p in enumerate(self.probs))
+
+    def band_odds(self, bands=JUDGMENT_BANDS):
+        return {name: self.between(lo, hi) for name, lo, hi in bands}
+
+
+@lru_cache(maxsize=256)
+def distribution(formula):
+    """Exact distribution of a formula by convolution, memoized per formula.
+
+    Exploding dice are followed until the remaining chain has less than
+    1e-12 probability.
+    """
+    lo, probs = compile_formula(formula).distribution()
+    return Distribution(lo, probs)
@@ -190,7 +190,7 @@ async def askdm(ctx, *, prompt: str):
     else:
         char_desc = "You are an unnamed adventurer."
 
-    roll_result = roll_formula("2d6+{0}".format(d20_bonus))
+    roll_result = roll_formula("2d6{0:+d}".format(d20_bonus))
     await ctx.send(f"You rolled a **{roll_result}** on your action.")
 
     system_prompt = (
@@ -1,40 +1,101 @@
 # main.py
 import os
 import json
-import random
-import re
+import asyncio
 import nextcord
-import requests
 from nextcord.ext import commands
 from dotenv import load_dotenv
 from datetime import datetime
 from nextcord.ui import View, Button, Modal, TextInput
 from nextcord import Interaction, TextInputStyle, ButtonStyle
+from model_router import ModelRouter
+from hedging import Hedger
+from dice import DiceError, distribution as dice_distribution, roll as roll_formula
+from character_repo import Character, CharacterRepository
+from context_window import build_context
+from prompt_prefix import PromptPrefixes
+from rules import RulesEngine
+from skill_check import SkillChecker
+from summarizer import Summarizer
+from sessions import SessionRegistry
+from response_cache import ResponseCache
+from rate_limit import RateLimiter, UserBusy
+from offload_queue import OffloadQueue
+from job_queue import GEN_QUEUE_SIZE, GenerationQueue, QueueFull, PRIORITY_CURRENT_TURN, PRIORITY_PARTY, PRIORITY_IDLE
+from streaming import stream_reply
+from log_sink import LogSink, split_message
+from channels import ChannelIndex
+from sharding import ShardReporter, shard_options
+from lifecycle import run_bot
+from metrics import REGISTRY, DISCORD_RATELIMITS, MetricsServer, Tracer, instrument_http, span
+from conversation_store import ConversationStore, memory_messages
 
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "1") == "1"
+# Hand generation to gen_worker.py processes instead of running it here.
+OFFLOAD_GENERATION = os.getenv("OFFLOAD_GENERATION", "0") == "1"
 
 intents = nextcord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+# One process per shard range (see launcher.py); guild state never crosses workers.
+bot = commands.AutoShardedBot(command_prefix="!", intents=intents, **shard_options())
+llm = ModelRouter.from_env(OPENROUTER_API_KEY)
+hedger = Hedger(llm)
+store = ConversationStore()
+summarizer = Summarizer(store, llm)
+sessions = SessionRegistry()
+response_cache = ResponseCache()
+rate_limiter = RateLimiter()
+generation_queue = GenerationQueue()
+offload_queue = OffloadQueue() if OFFLOAD_GENERATION else None
+character_repo = CharacterRepository()
+prompt_prefixes = PromptPrefixes()
+rules_engine = RulesEngine.from_file()
+skill_checker = SkillChecker.from_file()
+character_repo.listeners.append(prompt_prefixes.invalidate)
+character_repo.listeners.append(skill_checker.invalidate)
+log_sink = LogSink()
+channels = ChannelIndex()
+tracer = Tracer()
+metrics_server = MetricsServer(REGISTRY, tracer)
+shard_reporter = ShardReporter(bot)
+
+instrument_http(bot.http)
+REGISTRY.collect("riftdm_llm_events_total", "Upstream LLM requests, errors and tokens per backend.", lambda: [
+    ({"backend": b.name, "event": k}, v) for b in llm.backends for k, v in b.client.stats.items()
+], kind="counter")
+REGISTRY.collect("riftdm_llm_latency_seconds", "Rolling upstream latency quantiles per backend.", lambda: [
+    ({"backend": b.name, "quantile": q}, b.latency.percentile(q * 100)) for b in llm.backends for q in (0.5, 0.95)
+])
+REGISTRY.collect("riftdm_llm_first_token_seconds", "Rolling time-to-first-token quantiles per backend.", lambda: [
+    ({"backend": b.name, "quantile": q}, b.first_token.percentile(q * 100)) for b in llm.backends for q in (0.5, 0.95)
+])
+REGISTRY.stats("riftdm_router_events_total", "Model router requests and failovers.", llm.stats)
+REGISTRY.stats("riftdm_hedge_events_total", "Hedged askdm requests and wasted tokens.", hedger.stats)
+REGISTRY.stats("riftdm_generation_jobs_total", "Generation queue outcomes.", generation_queue.stats)
+REGISTRY.stats("riftdm_rate_limit_events_total", "askdm rate limiter decisions.", rate_limiter.counters)
+REGISTRY.stats("riftdm_log_sink_events_total", "Write-behind #logs entries, sends and retries.", log_sink.stats)
+REGISTRY.stats("riftdm_channel_index_events_total", "Channel index scans and invalidations.", channels.stats)
+REGISTRY.stats("riftdm_skill_check_events_total", "Pre-LLM skill checks and rejections.", skill_checker.stats)
+REGISTRY.collect("riftdm_cache_lookups_total", "Cache hits and misses.", lambda: [
+    ({"cache": "response", "result": "hit"}, response_cache.hits),
+    ({"cache": "response", "result": "miss"}, response_cache.misses),
+    ({"cache": "prompt_prefix", "result": "hit"}, prompt_prefixes.hits),
+    ({"cache": "prompt_prefix", "result": "miss"}, prompt_prefixes.misses),
+    ({"cache": "skill_check", "result": "hit"}, skill_checker.hits),
+    ({"cache": "skill_check", "result": "miss"}, skill_checker.misses),
+], kind="counter")
+REGISTRY.collect("riftdm_cache_hit_ratio", "Hit rate of the reply cache.", lambda: [({"cache": "response"}, response_cache.hit_rate())])
+REGISTRY.collect("riftdm_generation_queue_depth", "Generation jobs waiting for a worker.", lambda: [({}, generation_queue.depth())])
+REGISTRY.collect("riftdm_offload_queue_depth", "Jobs waiting for a gen_worker.py process.",
+                 lambda: [({}, offload_queue.depth())] if offload_queue else [])
+REGISTRY.collect("riftdm_party_sessions", "Party sessions held in memory.", lambda: [({}, len(sessions))])
 
-characters = {}
-party_members = []
-current_turn = 0
 status_effects = {}
 player_stats = {}
 
-def roll_formula(formula):
-    match = re.match(r"(\d+)d(\d+)([+-]\d+)?", formula)
-    if not match:
-        return 0
-    num_dice = int(match[1])
-    die_size = int(match[2])
-    modifier = int(match[3]) if match[3] else 0
-    rolls = [random.randint(1, die_size) for _ in range(num_dice)]
-    return sum(rolls) + modifier
-
 class CreateCharModal(Modal):
     def __init__(self):
         super().__init__("Create Your Character")
@@ -49,34 +110,16 @@ class CreateCharModal(Modal):
         self.add_item(self.personality)
 
     async def callback(self, interaction: Interaction):
-        user_id = str(interaction.user.id)
-        characters[user_id] = {
-            "name": self.name.value,
-            "race": self.race.value,
-            "class": self.char_class.value,
-            "stats": {
-                "strength": 10,
-                "dexterity": 10,
-                "intelligence": 10
-            },
-            "passives": [],
-            "personality": self.personality.value,
-            "inventory": []
-        }
+        tracer.start("createchar_modal")
+        user_id = interaction.user.id
+        char = Character(self.name.value, self.race.value, self.char_class.value, personality=self.personality.value)
+        character_repo.save(interaction.guild.id, user_id, char)
         await interaction.response.send_message(f"✅ Character `{self.name.value}` created!", ephemeral=True)
+        tracer.finish()
 
-        log_channel = nextcord.utils.get(interaction.guild.text_channels, name="logs")
+        log_channel = channels.get(interaction.guild)
         if log_channel:
-            await log_channel.send(
-                "[CHARACTER LOG]\n"
-                f"UserID: {user_id}\n"
-                f"Name: {self.name.value}\n"
-                f"Race: {self.race.value}\n"
-                f"Class: {self.char_class.value}\n"
-                f"Stats: {json.dumps(characters[user_id]['stats'])}\n"
-                f"Passives: {json.dumps(characters[user_id]['passives'])}\n"
-                f"Personality: {self.personality.value}"
-            )
+            log_sink.post(log_channel, char.log_entry(user_id))
 
 class CreateCharButton(View):
     def __init__(self):
@@ -87,34 +130,22 @@ class CreateCharButton(View):
         await interaction.response.send_modal(CreateCharModal())
 
 @bot.command()
+@commands.guild_only()
 async def deletechar(ctx):
-    user_id = str(ctx.author.id)
-    if user_id in characters:
-        del characters[user_id]
+    if character_repo.delete(ctx.guild.id, ctx.author.id):
         await ctx.send(f"🗑️ Your character has been deleted, {ctx.author.display_name}.")
     else:
         await ctx.send("❌ You don’t have a character to delete.")
 
 @bot.command()
+@commands.guild_only()
 async def charui(ctx):
     await ctx.send("Click below to create your character:", view=CreateCharButton())
 
 @bot.command()
+@commands.guild_only()
 async def createchar(ctx, name: str, race: str, char_class: str):
-    user_id = str(ctx.author.id)
-    characters[user_id] = {
-        "name": name,
-        "race": race,
-        "class": char_class,
-        "stats": {
-            "strength": 10,
-            "dexterity": 10,
-            "intelligence": 10
-        },
-        "passives": [],
-        "personality": "",
-        "inventory": []
-    }
+    character_repo.save(ctx.guild.id, ctx.author.id, Character(name, race, char_class))
     await ctx.send(
     f"Character created for {ctx.author.display_name}:\n"
     f"Name: `{name}`\n"
@@ -123,121 +154,198 @@ async def createchar(ctx, name: str, race: str, char_class: str):
     )
 
 @bot.command()
+@commands.guild_only()
 async def mychar(ctx):
-    user_id = str(ctx.author.id)
-    char = characters.get(user_id)
+    char = character_repo.get(ctx.guild.id, ctx.author.id)
 
     if char:
-        stats = char['stats']
         await ctx.send(
             f"{ctx.author.display_name}'s Character:\n"
-            f"Name: `{char['name']}`\n"
-            f"Race: `{char['race']}`\n"
-            f"Class: `{char['class']}`\n"
-            f"Stats: {json.dumps(stats)}\n"
-            f"Passives: {', '.join(char['passives']) if char['passives'] else 'None'}"
+            f"Name: `{char.name}`\n"
+            f"Race: `{char.race}`\n"
+            f"Class: `{char.char_class}`\n"
+            f"Stats: {json.dumps(char.stats.as_dict())}\n"
+            f"Passives: {', '.join(char.passives) if char.passives else 'None'}\n"
+            f"Inventory: {', '.join(char.inventory) if char.inventory else 'None'}"
         )
     else:
         await ctx.send("❌ You haven’t created a character yet. Use `!createchar` or `!charui` to begin.")
 
 @bot.command()
+@commands.guild_only()
 async def startparty(ctx, *members):
-    global party_members, current_turn
-    party_members = list(members)
-    current_turn = 0
-    if party_members:
+    session = sessions.get(ctx.guild.id, ctx.channel.id)
+    async with session.lock:
+        session.members = list(members)
+        session.current_turn = 0
+    if members:
         await ctx.send(
-            f"Party order set: {', '.join(party_members)}\n"
-            f"➡️ It's **{party_members[0]}'s** turn!"
+            f"Party order set: {', '.join(members)}\n"
+            f"➡️ It's **{members[0]}'s** turn!"
         )
     else:
         await ctx.send("You must specify at least one party member.")
 
 @bot.command()
+@commands.guild_only()
 async def nextturn(ctx):
-    global current_turn
-    if not party_members:
-        await ctx.send("No party members set. Use `!startparty` first.")
-        return
-    current_turn = (current_turn + 1) % len(party_members)
-    await ctx.send(f"➡️ It's now **{party_members[current_turn]}'s** turn!")
+    session = sessions.get(ctx.guild.id, ctx.channel.id)
+    async with session.lock:
+        if not session.members:
+            await ctx.send("No party members set. Use `!startparty` first.")
+            return
+        session.current_turn = (session.current_turn + 1) % len(session.members)
+        member = session.members[session.current_turn]
+    await ctx.send(f"➡️ It's now **{member}'s** turn!")
 
 @bot.command()
+@commands.guild_only()
 async def addmember(ctx, member: str):
-    global party_members
-    party_members.append(member)
-    await ctx.send(f"Added {member} to the party. Current order: {', '.join(party_members)}")
+    session = sessions.get(ctx.guild.id, ctx.channel.id)
+    async with session.lock:
+        session.members.append(member)
+        order = ', '.join(session.members)
+    await ctx.send(f"Added {member} to the party. Current order: {order}")
 
 @bot.command()
+@commands.guild_only()
 async def endparty(ctx):
-    global party_members, current_turn
-    party_members = []
-    current_turn = 0
+    sessions.end(ctx.guild.id, ctx.channel.id)
     await ctx.send("Party turn tracking ended.")
 
+@bot.command(name="roll")
+async def roll_dice(ctx, *, formula: str):
+    try:
+        total = roll_formula(formula)
+    except DiceError as e:
+        await ctx.send(f"❌ {e}")
+        return
+    await ctx.send(f"🎲 `{formula}` → **{total}**")
+
 @bot.command()
-async def askdm(ctx, *, prompt: str):
-    user_id = str(ctx.author.id)
-    d20_bonus = 0
-    char = characters.get(user_id)
+async def odds(ctx, *, formula: str):
+    try:
+        # Big pools take a while to convolve; keep the event loop free meanwhile.
+        dist = await asyncio.to_thread(dice_distribution, formula)
+    except DiceError as e:
+        await ctx.send(f"❌ {e}")
+        return
+    bands = dist.band_odds()
+    await ctx.send(
+        f"🎲 `{formula}` rolls {dist.lo}–{dist.hi}, average {dist.mean():.2f}\n"
+        f"⚠️ Negative (10 or less): {bands['negative']:.1%}\n"
+        f"🤔 Average (11–17): {bands['average']:.1%}\n"
+        f"✨ Positive (18+): {bands['positive']:.1%}"
+    )
 
-    if char:
-        if "Ambidextrous" in char.get("passives", []) and "hands" in prompt:
-            d20_bonus += 2
-        personality = char.get("personality", "")
-        char_desc = f"You are {char['name']}, a {char['race']} {char['class']} with a {personality} personality."
+def turn_priority(ctx):
+    """The player whose turn it is goes first, then the rest of the party, then everyone else."""
+    session = sessions.find(ctx.guild.id, ctx.channel.id)
+    if not session or not session.members:
+        return PRIORITY_IDLE
+    author = {ctx.author.name.lower(), ctx.author.display_name.lower(), ctx.author.mention, f"<@!{ctx.author.id}>"}
+    members = [m.lower() for m in session.members]
+    if members[session.current_turn % len(members)] in author:
+        return PRIORITY_CURRENT_TURN
+    if author.intersection(members):
+        return PRIORITY_PARTY
+    return PRIORITY_IDLE
+
+async def generate_reply(ctx, messages):
+    if STREAM_REPLIES:
+        return await stream_reply(ctx, hedger.stream(messages), prefix="**DM Reply:** ")
+    if hedger.enabled:
+        reply = "".join([delta async for delta in hedger.stream(messages)]).strip()
     else:
-        char_desc = "You are an unnamed adventurer."
+        reply = await llm.complete(messages)
+    await ctx.send(f"**DM Reply:** {reply}")
+    return reply
 
-    roll_result = roll_formula(f"2d6+{d20_bonus}")
+@bot.command()
+@commands.guild_only()
+async def askdm(ctx, *, prompt: str):
+    # Turn away actions the character can't attempt before they cost a model call.
+    char = character_repo.get(ctx.guild.id, ctx.author.id)
+    blocked = skill_checker.check(ctx.guild.id, ctx.author.id, char, prompt)
+    if blocked:
+        await ctx.send(f"🚫 {char.name} {blocked.reason}.")
+        return
+    try:
+        async with rate_limiter.one_at_a_time(
+            ctx.author.id, on_queued=lambda: ctx.send("⏳ Still working on your last prompt, this one is next.")
+        ):
+            limited = rate_limiter.check(ctx.author.id, ctx.guild.id, llm.model)
+            if limited:
+                scope, retry_after = limited
+                who = {"user": "You're", "guild": "This server is", "model": "The DM is"}[scope]
+                await ctx.send(f"⏳ {who} asking too fast. Try again in {retry_after:.0f}s.")
+                return
+            await run_askdm(ctx, prompt)
+    except UserBusy:
+        await ctx.send("⏳ You already have a prompt waiting. Hold on until the DM answers it.")
+
+async def run_askdm(ctx, prompt):
+    char = character_repo.get(ctx.guild.id, ctx.author.id)
+    d20_bonus, _ = rules_engine.bonus(char, prompt)
+    # System prompt + character sentence, built once per character and kept
+    # first so the provider's prompt cache sees the same prefix every time.
+    prefix = prompt_prefixes.get(ctx.guild.id, ctx.author.id, char)
+
+    roll_result = roll_formula(f"2d6{d20_bonus:+d}")
     await ctx.send(f"You rolled a **{roll_result}** on your action.")
 
-    system_prompt = (
-        "Assume the role of an expert fantasy writer that specializes in interactive fiction. "
-        "Your job is to respond to fantasy roleplay prompts with vivid, descriptive, immersive responses, "
-        "including what the player sees, feels, and what NPCs might do. Avoid meta-commentary."
-    )
+    log_channel = channels.get(ctx.guild)
+    if offload_queue is not None:
+        await offload_askdm(ctx, prompt, roll_result, char, log_channel)
+        return
 
-    log_channel = nextcord.utils.get(ctx.guild.text_channels, name="logs")
-    quest_id = 1
-    memory_messages = []
-
-    if log_channel:
-        async for msg in log_channel.history(limit=50, oldest_first=True):
-            if msg.author == bot.user and "**DM Reply:**" in msg.content:
-                try:
-                    quest_line = int(msg.content.split("Quest ID: #")[1].split("\n")[0])
-                    if quest_line >= quest_id:
-                        quest_id = quest_line + 1
-                    user_input = msg.content.split("Prompt:** ")[1].split("\n**DM Reply:**")[0]
-                    bot_reply = msg.content.split("**DM Reply:** ")[1]
-                    memory_messages.append({"role": "user", "content": user_input})
-                    memory_messages.append({"role": "assistant", "content": bot_reply})
-                except Exception:
-                    continue
-
-    messages = [{"role": "system", "content": system_prompt}] + memory_messages
-    messages.append({"role": "user", "content": f"{char_desc} {prompt} (Roll: {roll_result})"})
-
-    payload = {
-        "model": "mistralai/mistral-7b-instruct",
-        "messages": messages
-    }
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    with span("history"):
+        summarized_through, summary = store.summary(ctx.guild.id, ctx.channel.id)
+        turns = store.recent_turns(ctx.guild.id, ctx.channel.id, after=summarized_through)
 
-    try:
-        res = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload)
-        data = res.json()
-        reply = data['choices'][0]['message']['content'].strip()
-        await ctx.send(f"**DM Reply:** {reply}")
+    with span("prompt"):
+        messages = build_context(
+            prefix, memory_messages(turns), f"{prompt} (Roll: {roll_result})", llm.model,
+            summary=summary
+        )
+        cache_key = response_cache.key_for(llm.model, ctx.guild.id, ctx.channel.id, messages[:-1], prompt, roll_result)
 
+    try:
+        reply = response_cache.get(cache_key)
+        if reply is not None:
+            # Streamed replies can run past one message; spill them the same way.
+            for chunk in split_message(f"**DM Reply:** {reply}"):
+                await ctx.send(chunk)
+        else:
+            try:
+                job = generation_queue.submit(
+                    lambda: generate_reply(ctx, messages), priority=turn_priority(ctx), key=ctx.message.id
+                )
+            except QueueFull as e:
+                await ctx.send(f"🕰️ The DM is swamped ({e.waiting} prompts waiting). Try again shortly.")
+                return
+            position = job.position()
+            if position > 1:
+                await ctx.send(f"📜 You're number {position} in the queue.")
+            try:
+                # Queue wait + LLM + streaming the reply into the channel.
+                with span("llm"):
+                    reply = await job
+            except asyncio.CancelledError:
+                if job.future.cancelled():
+                    # The command message was deleted while the job waited.
+                    return
+                raise
+            response_cache.put(cache_key, reply)
+
+        with span("store"):
+            quest_id = store.add_turn(ctx.guild.id, ctx.channel.id, f"{prompt} (Roll: {roll_result})", reply)
+        summarizer.schedule(ctx.guild.id, ctx.channel.id)
+
+        # #logs is kept as a human-readable mirror; memory comes from the store.
         timestamp = datetime.now().strftime("%B %d, %Y – %I:%M %p")
         if log_channel:
-            await log_channel.send(
+            log_sink.post(log_channel,
                 f"Quest ID: #{quest_id}\n"
                 f"Timestamp: {timestamp}\n"
                 f"Prompt:** {prompt} (Roll: {roll_result})\n"
@@ -247,6 +355,32 @@ async def askdm(ctx, *, prompt: str):
     except Exception as e:
         await ctx.send(f"❌ Bot error: {str(e)}")
 
+async def offload_askdm(ctx, prompt, roll_result, char, log_channel):
+    waiting = offload_queue.depth()
+    if waiting >= GEN_QUEUE_SIZE:
+        await ctx.send(f"🕰️ The DM is swamped ({waiting} prompts waiting). Try again shortly.")
+        return
+    # Everything the worker needs, so it never has to ask this process.
+    job_id = offload_queue.put({
+        "guild_id": ctx.guild.id,
+        "channel_id": ctx.channel.id,
+        "user_id": ctx.author.id,
+        "prompt": prompt,
+        "roll": roll_result,
+        "character": char.as_dict() if char else None,
+        "log_channel_id": log_channel.id if log_channel else None,
+    }, turn_priority(ctx), ctx.message.id)
+    position = offload_queue.position(job_id)
+    if position > 1:
+        await ctx.send(f"📜 You're number {position} in the queue.")
+
+@bot.command()
+async def hedgestats(ctx):
+    if not hedger.enabled:
+        await ctx.send("Hedged requests are off (set `HEDGE_REQUESTS=1`).")
+        return
+    await ctx.send(hedger.report())
+
 @bot.command()
 async def helpme(ctx):
     await ctx.send(
@@ -258,6 +392,8 @@ async def helpme(ctx):
         "`!nextturn` - Progress to next turn\n"
         "`!addmember <name>` - Add a new member to party\n"
         "`!endparty` - End party session\n"
+        "`!roll <formula>` - Roll dice, e.g. `4d6kh3`, `1d20+1d4`, `adv`, `3d6!`\n"
+        "`!odds <formula>` - Exact odds of each judgment band for a dice formula\n"
         "`!askdm <prompt>` - Ask the Dungeon Master\n"
         "`!charui` - Create a character using buttons\n"
         "`!helpme` - Show this help message\n"
@@ -265,4 +401,64 @@ async def helpme(ctx):
     )
 
 
-bot.run(DISCORD_TOKEN)
+@bot.listen()
+async def on_raw_message_delete(payload):
+    generation_queue.cancel(payload.message_id)
+    if offload_queue is not None:
+        offload_queue.cancel_message(payload.message_id)
+
+@bot.event
+async def on_ready():
+    print(f"✅ Rift DM is online as {bot.user}!")
+    await metrics_server.start()
+    shard_reporter.start()
+
+@bot.before_invoke
+async def start_trace(ctx):
+    tracer.start(ctx.command.qualified_name)
+
+@bot.after_invoke
+async def finish_trace(ctx):
+    tracer.finish("error" if ctx.command_failed else "ok")
+    shard_reporter.count(ctx.guild)
+
+@bot.listen()
+async def on_http_ratelimit(limit, remaining, reset_after, bucket, scope):
+    # Fired both when a bucket runs dry and on a 429; Discord only sends
+    # X-RateLimit-Scope on 429 responses.
+    DISCORD_RATELIMITS.inc(kind="429" if scope else "exhausted", scope=scope or "bucket")
+
+@bot.listen()
+async def on_global_http_ratelimit(retry_after):
+    DISCORD_RATELIMITS.inc(kind="429", scope="global")
+
+@bot.listen()
+async def on_guild_channel_create(channel):
+    channels.channel_changed(channel)
+
+@bot.listen()
+async def on_guild_channel_update(before, after):
+    channels.channel_changed(before)
+    channels.channel_changed(after)
+
+@bot.listen()
+async def on_guild_channel_delete(channel):
+    channels.channel_changed(channel)
+
+@bot.listen()
+async def on_guild_remove(guild):
+    channels.forget(guild.id)
+
+async def shutdown():
+    await generation_queue.close()
+    await log_sink.close()
+    await metrics_server.close()
+    await shard_reporter.close()
+    await summarizer.close()
+    await llm.close()
+    store.close()
+    character_repo.close()
+    if offload_queue is not None:
+        offload_queue.close()
+
+run_bot(bot, DISCORD_TOKEN, shutdown)
@@ -0,0 +1,157 @@
+# gen_worker.py
+"""Generation worker: takes askdm jobs off the offload queue and answers them.
+
+    python gen_worker.py                 # GEN_WORKER_CONCURRENCY jobs at a time
+
+Run as many of these as the model can keep up with; the gateway process
+(final2.0.py with OFFLOAD_GENERATION=1) only queues jobs. Each job is built
+into a prompt here, sent to the model, and the reply is posted straight to
+the channel over Discord's REST API, so the gateway never waits on the LLM.
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+from datetime import datetime
+import aiohttp
+from dotenv import load_dotenv
+from character_repo import Character
+from context_window import build_context
+from conversation_store import ConversationStore, memory_messages
+from llm_client import LLMError
+from log_sink import split_message
+from model_router import ModelRouter
+from offload_queue import OffloadQueue
+from prompt_prefix import SYSTEM_PROMPT, character_preamble, prefix_message
+from summarizer import Summarizer
+
+load_dotenv()
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+DISCORD_API = "https://discord.com/api/v10"
+GEN_WORKER_CONCURRENCY = int(os.getenv("GEN_WORKER_CONCURRENCY", "4"))
+GEN_POLL_INTERVAL = float(os.getenv("GEN_POLL_INTERVAL", "0.25"))
+# How often finished jobs older than a day are deleted from gen_jobs.
+GEN_PURGE_INTERVAL = float(os.getenv("GEN_PURGE_INTERVAL", "3600"))
+MAX_SEND_ATTEMPTS = 5
+
+
+class DiscordPoster:
+    """Just enough of Discord's REST API to post messages, retrying 429s."""
+
+    def __init__(self, token, api=DISCORD_API):
+        self.token = token
+        self.api = api
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(headers={"Authorization": f"Bot {self.token}"})
+        return self._session
+
+    async def send(self, channel_id, content):
+        for chunk in split_message(content):
+            for _ in range(MAX_SEND_ATTEMPTS):
+                async with self._get_session().post(f"{self.api}/channels/{channel_id}/messages",
+                                                    json={"content": chunk}) as res:
+                    if res.status == 429:
+                        data = await res.json(content_type=None)
+                        await asyncio.sleep(float(data.get("retry_after", 1)))
+                        continue
+                    if res.status >= 400:
+                        raise RuntimeError(f"Discord HTTP {res.status}: {await res.text()}")
+                    break
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class GenerationWorker:
+    def __init__(self, queue, store, llm, discord, concurrency=GEN_WORKER_CONCURRENCY):
+        self.queue = queue
+        self.store = store
+        self.llm = llm
+        self.discord = discord
+        self.summarizer = Summarizer(store, llm)
+        self.concurrency = concurrency
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def handle(self, job):
+        guild_id, channel_id = job["guild_id"], job["channel_id"]
+        char = Character(**job["character"]) if job["character"] else None
+        prompt = f"{job['prompt']} (Roll: {job['roll']})"
+
+        summarized_through, summary = self.store.summary(guild_id, channel_id)
+        turns = self.store.recent_turns(guild_id, channel_id, after=summarized_through)
+        messages = build_context(
+            prefix_message(SYSTEM_PROMPT, character_preamble(char)), memory_messages(turns), prompt,
+            self.llm.model, summary=summary
+        )
+
+        reply = await self.llm.complete(messages)
+        await self.discord.send(channel_id, f"**DM Reply:** {reply}")
+        quest_id = self.store.add_turn(guild_id, channel_id, prompt, reply)
+        self.summarizer.schedule(guild_id, channel_id)
+
+        if job.get("log_channel_id"):
+            timestamp = datetime.now().strftime("%B %d, %Y – %I:%M %p")
+            await self.discord.send(job["log_channel_id"],
+                f"Quest ID: #{quest_id}\n"
+                f"Timestamp: {timestamp}\n"
+                f"Prompt:** {prompt}\n"
+                f"**DM Reply:** {reply}"
+            )
+
+    async def _loop(self):
+        while True:
+            try:
+                claimed = self.queue.claim(self.name)
+            except sqlite3.OperationalError as e:
+                # Usually "database is locked" under heavy contention; try again shortly.
+                print(f"⚠️ Could not claim a job: {e}")
+                claimed = None
+            if claimed is None:
+                await asyncio.sleep(GEN_POLL_INTERVAL)
+                continue
+            job_id, job = claimed
+            try:
+                await self.handle(job)
+            except Exception as e:
+                # Whatever went wrong, only this job fails; the loop keeps going
+                # and the job is marked failed rather than left to a lease expiry.
+                if not isinstance(e, (LLMError, RuntimeError, aiohttp.ClientError)):
+                    print(f"⚠️ Generation job {job_id} failed: {e!r}")
+                self.queue.finish(job_id, error=str(e) or repr(e))
+                try:
+                    await self.discord.send(job["channel_id"], f"❌ Bot error: {str(e)}")
+                except Exception:
+                    pass
+            else:
+                self.queue.finish(job_id)
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                self.queue.purge()
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Could not purge finished jobs: {e}")
+            await asyncio.sleep(GEN_PURGE_INTERVAL)
+
+    async def run(self):
+        print(f"✅ Generation worker {self.name} running {self.concurrency} at a time")
+        try:
+            await asyncio.gather(self._purge_loop(), *(self._loop() for _ in range(self.concurrency)))
+        finally:
+            await self.summarizer.close()
+            await self.llm.close()
+            await self.discord.close()
+
+
+if __name__ == "__main__":
+    worker = GenerationWorker(OffloadQueue(), ConversationStore(), ModelRouter.from_env(OPENROUTER_API_KEY),
+                              DiscordPoster(DISCORD_TOKEN))
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
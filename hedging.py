@@ -0,0 +1,131 @@
+# hedging.py
+import asyncio
+import os
+import time
+from context_window import count_tokens, message_tokens
+from model_router import LatencyWindow, ROUTER_MIN_SAMPLES
+
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+# Used until enough first-token samples exist for a percentile.
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "5"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+
+_END = object()
+
+
+class Hedger:
+    """Hedged streaming completions: a slow first token triggers a duplicate request.
+
+    If the first attempt has not produced a token within the HEDGE_PERCENTILE
+    of recent first-token latencies, an identical second request goes out.
+    Whichever streams a token first wins and the other is cancelled. The
+    counters show what that costs: how often a hedge fires, how often it
+    wins, and the prompt and completion tokens spent on losing attempts.
+    """
+
+    def __init__(self, llm, enabled=HEDGE_REQUESTS, percentile=HEDGE_PERCENTILE,
+                 default_delay=HEDGE_DEFAULT_DELAY, min_delay=HEDGE_MIN_DELAY):
+        self.llm = llm
+        self.enabled = enabled
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.first_token = LatencyWindow()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0,
+                      "wasted_prompt_tokens": 0, "wasted_completion_tokens": 0}
+
+    def delay(self):
+        if len(self.first_token) < ROUTER_MIN_SAMPLES:
+            return self.default_delay
+        return max(self.min_delay, self.first_token.percentile(self.percentile) or self.default_delay)
+
+    def hedge_rate(self):
+        return self.stats["hedged"] / self.stats["requests"] if self.stats["requests"] else 0.0
+
+    def stream(self, messages, **params):
+        """Same contract as `llm.stream()`; only hedges when enabled."""
+        if not self.enabled:
+            return self.llm.stream(messages, **params)
+        return self._hedged(messages, params)
+
+    async def _pump(self, messages, params, queue, produced):
+        try:
+            async for delta in self.llm.stream(messages, **params):
+                produced.append(delta)
+                await queue.put(delta)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_END)
+
+    async def _hedged(self, messages, params):
+        self.stats["requests"] += 1
+        started = time.monotonic()
+        attempts = []   # (task, queue, produced deltas)
+
+        def launch():
+            queue = asyncio.Queue()
+            produced = []
+            attempts.append((asyncio.create_task(self._pump(messages, params, queue, produced)), queue, produced))
+
+        async def first_item(queue):
+            return queue, await queue.get()
+
+        launch()
+        winner = None
+        errors = []
+        waiters = {asyncio.create_task(first_item(attempts[0][1]))}
+        try:
+            deadline = self.delay()
+            while waiters and winner is None:
+                done, waiters = await asyncio.wait(waiters, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # First token is late: send the identical request once.
+                    deadline = None
+                    self.stats["hedged"] += 1
+                    launch()
+                    waiters.add(asyncio.create_task(first_item(attempts[-1][1])))
+                    continue
+                for waiter in done:
+                    queue, item = waiter.result()
+                    if isinstance(item, Exception):
+                        errors.append(item)
+                    elif winner is None:
+                        winner = next(a for a in attempts if a[1] is queue)
+                        first = item
+            if winner is None:
+                raise errors[-1]
+            self.first_token.record(time.monotonic() - started)
+            if winner is not attempts[0]:
+                self.stats["hedge_wins"] += 1
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt[0].cancel()
+            if first is _END:
+                return
+            yield first
+            while True:
+                item = await winner[1].get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            for task, _, produced in attempts:
+                task.cancel()
+            if len(attempts) > 1:
+                # One attempt's prompt (and whatever it generated) was paid for twice.
+                self.stats["wasted_prompt_tokens"] += sum(message_tokens(m) for m in messages)
+                for task, _, produced in attempts:
+                    if winner is None or task is not winner[0]:
+                        self.stats["wasted_completion_tokens"] += count_tokens("".join(produced))
+
+    def report(self):
+        s = self.stats
+        return (f"Hedged {s['hedged']}/{s['requests']} prompts ({self.hedge_rate():.0%}), "
+                f"hedge won {s['hedge_wins']}, wasted {s['wasted_prompt_tokens']} prompt + "
+                f"{s['wasted_completion_tokens']} completion tokens, hedge delay {self.delay():.1f}s")
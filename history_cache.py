@@ -0,0 +1,90 @@
+# history_cache.py
+import os
+from collections import OrderedDict
+
+HISTORY_TURNS = int(os.getenv("HISTORY_TURNS", "50"))
+HISTORY_GUILDS = int(os.getenv("HISTORY_GUILDS", "1000"))
+
+
+def parse_dm_log(content):
+    """Parse a `Quest ID: #...` log entry into (quest_id, prompt, reply), or None."""
+    if "**DM Reply:**" not in content:
+        return None
+    try:
+        quest_id = int(content.split("Quest ID: #")[1].split("\n")[0])
+        prompt = content.split("Prompt:** ")[1].split("\n**DM Reply:**")[0]
+        reply = content.split("**DM Reply:** ")[1]
+    except (IndexError, ValueError):
+        return None
+    return quest_id, prompt, reply
+
+
+class HistoryCache:
+    """Parsed `#logs` turns per guild, kept current from gateway events.
+
+    Each guild holds at most `turns` entries keyed by log message id, so edits
+    and deletes land on the right turn; at most `guilds` guilds are kept and
+    the least recently used one is dropped (and re-warmed on demand).
+    """
+
+    def __init__(self, turns=HISTORY_TURNS, guilds=HISTORY_GUILDS):
+        self.turns = turns
+        self.guilds = guilds
+        self._entries = OrderedDict()   # guild_id -> OrderedDict(message_id -> turn)
+        self._last_quest = {}
+
+    def is_warm(self, guild_id):
+        return guild_id in self._entries
+
+    def _guild(self, guild_id):
+        entries = self._entries.get(guild_id)
+        if entries is None:
+            entries = self._entries[guild_id] = OrderedDict()
+            if len(self._entries) > self.guilds:
+                evicted, _ = self._entries.popitem(last=False)
+                self._last_quest.pop(evicted, None)
+        else:
+            self._entries.move_to_end(guild_id)
+        return entries
+
+    def warm(self, guild_id, messages):
+        """Seed a guild from `(message_id, content)` pairs, oldest first."""
+        self._guild(guild_id)
+        for message_id, content in messages:
+            self.add(guild_id, message_id, content)
+
+    def add(self, guild_id, message_id, content):
+        turn = parse_dm_log(content)
+        if turn is None:
+            return
+        entries = self._guild(guild_id)
+        entries[message_id] = turn
+        if len(entries) > self.turns:
+            entries.popitem(last=False)
+        if turn[0] > self._last_quest.get(guild_id, 0):
+            self._last_quest[guild_id] = turn[0]
+
+    def edit(self, guild_id, message_id, content):
+        entries = self._entries.get(guild_id)
+        if entries is None or message_id not in entries:
+            return
+        turn = parse_dm_log(content)
+        if turn is None:
+            del entries[message_id]
+        else:
+            entries[message_id] = turn
+
+    def remove(self, guild_id, message_id):
+        entries = self._entries.get(guild_id)
+        if entries is not None:
+            entries.pop(message_id, None)
+
+    def next_quest_id(self, guild_id):
+        return self._last_quest.get(guild_id, 0) + 1
+
+    def memory_messages(self, guild_id):
+        messages = []
+        for _, prompt, reply in self._guild(guild_id).values():
+            messages.append({"role": "user", "content": prompt})
+            messages.append({"role": "assistant", "content": reply})
+        return messages
@@ -0,0 +1,157 @@
+# job_queue.py
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+GEN_WORKERS = int(os.getenv("GEN_WORKERS", "4"))
+GEN_QUEUE_SIZE = int(os.getenv("GEN_QUEUE_SIZE", "50"))
+GEN_DEADLINE = float(os.getenv("GEN_DEADLINE", "120"))
+
+# Lower runs first.
+PRIORITY_CURRENT_TURN = 0
+PRIORITY_PARTY = 1
+PRIORITY_IDLE = 2
+
+
+class QueueFull(Exception):
+    def __init__(self, waiting):
+        super().__init__(f"{waiting} jobs waiting")
+        self.waiting = waiting
+
+
+class JobExpired(Exception):
+    """The job's deadline passed before it could finish."""
+
+    def __init__(self):
+        super().__init__("the DM took too long to answer")
+
+
+class Job:
+    __slots__ = ("key", "sort_key", "fn", "deadline", "future", "queue")
+
+    def __init__(self, key, sort_key, fn, deadline, future, queue):
+        self.key = key
+        self.sort_key = sort_key
+        self.fn = fn
+        self.deadline = deadline
+        self.future = future
+        self.queue = queue
+
+    def __lt__(self, other):
+        return self.sort_key < other.sort_key
+
+    def position(self):
+        """1-based place among jobs still waiting; 0 once a worker has it."""
+        return self.queue._position(self)
+
+    def cancel(self):
+        self.future.cancel()
+
+    def __await__(self):
+        return self.future.__await__()
+
+
+class GenerationQueue:
+    """Bounded priority queue for LLM generation served by a fixed worker pool.
+
+    Jobs are coroutine functions. Higher-priority jobs (lower number) go first,
+    then first come first served. When `maxsize` jobs are already waiting,
+    `submit()` raises QueueFull instead of piling more work upstream. A job
+    that is cancelled, or whose deadline passes while it waits, is skipped;
+    one that overruns its deadline while running is cancelled.
+    """
+
+    def __init__(self, workers=GEN_WORKERS, maxsize=GEN_QUEUE_SIZE, deadline=GEN_DEADLINE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.deadline = deadline
+        self._heap = []
+        self._by_key = {}
+        self._seq = itertools.count()
+        self._items = None
+        self._tasks = []
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "expired": 0, "cancelled": 0, "rejected": 0}
+
+    def depth(self):
+        return sum(1 for job in self._heap if not job.future.done())
+
+    def submit(self, fn, priority=PRIORITY_IDLE, key=None, deadline=None):
+        if self._items is None:
+            self._start()
+        waiting = self.depth()
+        if waiting >= self.maxsize:
+            self.stats["rejected"] += 1
+            raise QueueFull(waiting)
+        loop = asyncio.get_running_loop()
+        expires = time.monotonic() + (deadline or self.deadline)
+        job = Job(key, (priority, next(self._seq)), fn, expires, loop.create_future(), self)
+        heapq.heappush(self._heap, job)
+        if key is not None:
+            self._by_key[key] = job
+            job.future.add_done_callback(lambda _: self._by_key.get(key) is job and self._by_key.pop(key))
+        self.stats["submitted"] += 1
+        self._items.release()
+        return job
+
+    def cancel(self, key):
+        """Cancel the job submitted under `key` (e.g. the command message id), if any."""
+        job = self._by_key.pop(key, None)
+        if job is not None and not job.future.done():
+            job.cancel()
+            self.stats["cancelled"] += 1
+            return True
+        return False
+
+    def _position(self, job):
+        if job not in self._heap:
+            return 0
+        return 1 + sum(1 for other in self._heap if other < job and not other.future.done())
+
+    def _start(self):
+        self._items = asyncio.Semaphore(0)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            await self._items.acquire()
+            job = heapq.heappop(self._heap)
+            if job.future.done():
+                continue
+            remaining = job.deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats["expired"] += 1
+                job.future.set_exception(JobExpired())
+                continue
+            run = asyncio.ensure_future(job.fn())
+            # Cancelling the job (e.g. its message was deleted) cancels the run.
+            job.future.add_done_callback(lambda f, run=run: f.cancelled() and run.cancel())
+            try:
+                result = await asyncio.wait_for(run, remaining)
+            except asyncio.TimeoutError:
+                run.cancel()
+                self.stats["expired"] += 1
+                if not job.future.done():
+                    job.future.set_exception(JobExpired())
+            except asyncio.CancelledError:
+                # Only the job was cancelled; a cancelled worker is shutting down.
+                if job.future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                job.cancel()
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.stats["completed"] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in self._heap:
+            job.cancel()
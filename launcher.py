@@ -0,0 +1,175 @@
+# launcher.py
+"""Run the bot as several shard worker processes.
+
+    python launcher.py --workers 4            # shard count from Discord
+    python launcher.py --workers 2 --shards 8 --bot final2.0.py
+
+Shards are split into contiguous ranges, one range per worker. Each worker is
+the normal bot script with SHARD_COUNT / SHARD_IDS / WORKER_ID set (and
+METRICS_PORT offset by the worker id when metrics are on). Rate limits live
+in each process, so RATE_LIMIT_MODEL, the upstream quota, is split evenly
+between the workers; user and guild limits stay per process. A worker that
+exits is restarted with backoff; per-shard load is printed every
+--report seconds from the status files the workers write.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import aiohttp
+from dotenv import load_dotenv
+from rate_limit import RATE_LIMIT_MODEL
+from sharding import SHARD_STATUS_DIR, status_path
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+MAX_RESTART_DELAY = 60
+
+
+async def recommended_shards(token):
+    async with aiohttp.ClientSession(headers={"Authorization": f"Bot {token}"}) as session:
+        async with session.get(GATEWAY_BOT_URL) as res:
+            data = await res.json()
+            if res.status >= 400:
+                raise RuntimeError(f"Discord refused /gateway/bot: HTTP {res.status} {data}")
+            return data["shards"]
+
+
+def shard_ranges(shard_count, workers):
+    """Split 0..shard_count-1 into `workers` contiguous, near-equal ranges."""
+    workers = min(workers, shard_count)
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def worker_rate(rate, workers):
+    """RATE_LIMIT_MODEL for one of `workers` processes so that together they allow `rate`.
+
+    `rate` is (capacity, per_second) as from `rate_limit.parse_rate`. Each
+    worker keeps a burst of at least one request.
+    """
+    capacity, per_second = rate
+    share = max(1.0, capacity / workers)
+    return f"{share}/{share * workers / per_second}"
+
+
+class Worker:
+    def __init__(self, worker_id, shard_ids, shard_count, bot_file, status_dir, model_rate):
+        self.worker_id = worker_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.bot_file = bot_file
+        self.status_dir = status_dir
+        self.model_rate = model_rate
+        self.process = None
+        self.restarts = 0
+        self.restart_at = 0.0
+
+    def start(self):
+        env = dict(os.environ,
+                   WORKER_ID=str(self.worker_id),
+                   SHARD_COUNT=str(self.shard_count),
+                   SHARD_IDS=",".join(map(str, self.shard_ids)),
+                   SHARD_STATUS_DIR=self.status_dir,
+                   RATE_LIMIT_MODEL=self.model_rate)
+        if int(os.getenv("METRICS_PORT", "0")):
+            env["METRICS_PORT"] = str(int(os.environ["METRICS_PORT"]) + self.worker_id)
+        self.process = subprocess.Popen([sys.executable, self.bot_file], env=env)
+        print(f"🚀 Worker {self.worker_id} (pid {self.process.pid}) → shards {self.shard_ids}")
+
+    def check(self, now):
+        """Restart the worker if it has exited, backing off on repeated crashes."""
+        if self.process is None or self.process.poll() is None:
+            return
+        if not self.restart_at:
+            delay = min(MAX_RESTART_DELAY, 2 ** self.restarts)
+            print(f"⚠️ Worker {self.worker_id} exited with {self.process.returncode}; restarting in {delay}s")
+            self.restart_at = now + delay
+        elif now >= self.restart_at:
+            self.restarts += 1
+            self.restart_at = 0.0
+            self.start()
+
+    def status(self):
+        try:
+            with open(status_path(self.worker_id, self.status_dir)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+
+
+def report(workers):
+    print(f"{'shard':>5} {'worker':>6} {'guilds':>7} {'latency':>9} {'commands':>9}")
+    for worker in workers:
+        status = worker.status()
+        shards = status["shards"] if status else {}
+        stale = status is None or time.time() - status["time"] > 3 * 60
+        for shard in worker.shard_ids:
+            load = shards.get(str(shard))
+            if load is None or stale:
+                print(f"{shard:>5} {worker.worker_id:>6} {'-':>7} {'-':>9} {'-':>9}")
+                continue
+            latency = f"{load['latency_ms']:.0f}ms" if load["latency_ms"] is not None else "-"
+            print(f"{shard:>5} {worker.worker_id:>6} {load['guilds']:>7} {latency:>9} {load['commands']:>9}")
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    load_dotenv()
+    signal.signal(signal.SIGTERM, _terminate)
+    parser = argparse.ArgumentParser(description="Run the Rift DM bot as shard worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shards", type=int, default=0, help="total shard count (default: Discord's recommendation)")
+    parser.add_argument("--bot", default="final2.0.py")
+    parser.add_argument("--report", type=float, default=60, help="seconds between load reports")
+    args = parser.parse_args()
+
+    shard_count = args.shards or asyncio.run(recommended_shards(os.getenv("DISCORD_TOKEN")))
+    ranges = shard_ranges(shard_count, args.workers)
+    model_rate = worker_rate(RATE_LIMIT_MODEL, len(ranges))
+    workers = [Worker(i, ids, shard_count, args.bot, SHARD_STATUS_DIR, model_rate)
+               for i, ids in enumerate(ranges)]
+    print(f"✅ {shard_count} shards across {len(workers)} workers")
+    for worker in workers:
+        worker.start()
+
+    next_report = time.monotonic() + args.report
+    try:
+        while True:
+            time.sleep(1)
+            now = time.monotonic()
+            for worker in workers:
+                worker.check(now)
+            if now >= next_report:
+                report(workers)
+                next_report = now + args.report
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            if worker.process is not None:
+                try:
+                    worker.process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    worker.process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# lifecycle.py
+import asyncio
+import signal
+
+
+def run_bot(bot, token, shutdown):
+    """Like `bot.run(token)`, but awaits `shutdown()` before the bot closes.
+
+    `bot.run` stops the loop on SIGINT/SIGTERM and cancels every task, so
+    `on_close` handlers never get to run; on a clean `bot.close()` the
+    event is only scheduled and races the HTTP session closing. Here a
+    signal cancels the bot instead, `shutdown()` runs while the gateway and
+    HTTP session are still up (so queued #logs entries still go out), and
+    only then is the bot closed.
+    """
+    loop = bot.loop
+
+    async def main():
+        task = asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, task.cancel)
+            except NotImplementedError:
+                pass
+        try:
+            await bot.start(token)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            try:
+                await shutdown()
+            finally:
+                if not bot.is_closed():
+                    await bot.close()
+
+    async def cancel_rest():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await loop.shutdown_asyncgens()
+
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.run_until_complete(cancel_rest())
+        loop.close()
@@ -0,0 +1,139 @@
+# llm_client.py
+import asyncio
+import json
+import os
+import aiohttp
+from prompt_prefix import CachedMessage
+
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+DEFAULT_MODEL = "mistralai/mistral-7b-instruct"
+
+
+class LLMError(Exception):
+    """Raised when the completion endpoint fails or returns something unusable."""
+
+
+def encode_payload(messages, **fields):
+    """JSON request body, reusing the pre-encoded form of any CachedMessage."""
+    encoded = ",".join(m.encoded if isinstance(m, CachedMessage) else json.dumps(m) for m in messages)
+    return f'{json.dumps(fields)[:-1]}, "messages": [{encoded}]}}'
+
+
+class LLMClient:
+    """Shared async chat-completions client.
+
+    One pooled keep-alive session is reused by every command, and a semaphore
+    caps how many completions are in flight at once so a burst of `!askdm`
+    calls queues here instead of opening a socket each.
+    """
+
+    def __init__(self, api_key, url=OPENROUTER_URL, model=DEFAULT_MODEL,
+                 timeout=None, connect_timeout=None, max_concurrency=None, max_connections=None):
+        self.api_key = api_key
+        self.url = url
+        self.model = model
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+        self.connect_timeout = connect_timeout or float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+        self._limit = asyncio.Semaphore(max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+        self._session = None
+        self.stats = {"requests": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _count_usage(self, data):
+        usage = data.get("usage") if isinstance(data, dict) else None
+        if usage:
+            self.stats["prompt_tokens"] += usage.get("prompt_tokens") or 0
+            self.stats["completion_tokens"] += usage.get("completion_tokens") or 0
+
+    def _get_session(self):
+        # Created lazily so the session binds to the bot's running loop.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._session
+
+    async def complete(self, messages, model=None, **params):
+        payload = encode_payload(messages, model=model or self.model, **params)
+        self.stats["requests"] += 1
+        async with self._limit:
+            try:
+                async with self._get_session().post(self.url, data=payload) as res:
+                    # A proxy in front of the provider may answer 502/504 with an HTML page.
+                    body = await res.text()
+            except asyncio.TimeoutError:
+                self.stats["errors"] += 1
+                raise LLMError(f"completion timed out after {self.timeout:g}s")
+            except aiohttp.ClientError as e:
+                self.stats["errors"] += 1
+                raise LLMError(str(e))
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if res.status >= 400:
+            self.stats["errors"] += 1
+            detail = data.get("error", data) if isinstance(data, dict) else body[:200]
+            raise LLMError(f"HTTP {res.status}: {detail}")
+        if data is None:
+            self.stats["errors"] += 1
+            raise LLMError(f"response is not JSON: {body[:200]}")
+        self._count_usage(data)
+        try:
+            return data['choices'][0]['message']['content'].strip()
+        except (KeyError, IndexError, TypeError):
+            self.stats["errors"] += 1
+            raise LLMError(f"unexpected response: {data}")
+
+    async def stream(self, messages, model=None, **params):
+        """Yield content deltas from an SSE (`stream: true`) completion."""
+        payload = encode_payload(messages, model=model or self.model, stream=True, **params)
+        # A long narration may legitimately stream past the total timeout, so
+        # only the gap between chunks is bounded here.
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout, sock_read=self.timeout)
+        self.stats["requests"] += 1
+        async with self._limit:
+            try:
+                async with self._get_session().post(self.url, data=payload, timeout=timeout) as res:
+                    if res.status >= 400:
+                        raise LLMError(f"HTTP {res.status}: {(await res.text())[:200]}")
+                    async for raw in res.content:
+                        line = raw.decode("utf-8").strip()
+                        # Blank lines separate events; ":" lines are keep-alive comments.
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            return
+                        try:
+                            chunk = json.loads(data)
+                        except ValueError:
+                            continue
+                        if "error" in chunk:
+                            raise LLMError(f"stream error: {chunk['error']}")
+                        # Providers that report usage put it on the last chunk.
+                        self._count_usage(chunk)
+                        try:
+                            delta = chunk['choices'][0]['delta'].get('content')
+                        except (KeyError, IndexError, TypeError, AttributeError):
+                            continue
+                        if delta:
+                            yield delta
+            except LLMError:
+                self.stats["errors"] += 1
+                raise
+            except asyncio.TimeoutError:
+                self.stats["errors"] += 1
+                raise LLMError(f"stream stalled for more than {self.timeout:g}s")
+            except aiohttp.ClientError as e:
+                self.stats["errors"] += 1
+                raise LLMError(str(e))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
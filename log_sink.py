@@ -0,0 +1,103 @@
+# log_sink.py
+import asyncio
+import os
+
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "2.0"))
+LOG_MAX_RETRIES = int(os.getenv("LOG_MAX_RETRIES", "5"))
+DISCORD_LIMIT = 2000
+SEPARATOR = "\n\n"
+
+
+def split_message(text, limit=DISCORD_LIMIT):
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        cut = cut if cut > 0 else limit
+        yield text[:cut]
+        text = text[cut:].lstrip("\n")
+    if text:
+        yield text
+
+
+class LogSink:
+    """Write-behind mirror for `#logs`.
+
+    `post()` only queues the entry and returns, so commands no longer wait on
+    a Discord call for their log line. One background task per log channel
+    joins whatever arrives within `interval` seconds (up to one message worth
+    of text) into a single send, retries 429s with backoff, and `close()`
+    flushes everything still queued.
+    """
+
+    def __init__(self, interval=LOG_FLUSH_INTERVAL, max_chars=DISCORD_LIMIT, retries=LOG_MAX_RETRIES):
+        self.interval = interval
+        self.max_chars = max_chars
+        self.retries = retries
+        self._queues = {}
+        self._tasks = {}
+        self.stats = {"entries": 0, "messages": 0, "retries": 0, "dropped": 0}
+
+    def post(self, channel, content):
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = asyncio.Queue()
+            self._tasks[channel.id] = asyncio.create_task(self._drain(channel, queue))
+        for chunk in split_message(content, self.max_chars):
+            queue.put_nowait(chunk)
+            self.stats["entries"] += 1
+
+    async def _drain(self, channel, queue):
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            first = carry if carry is not None else await queue.get()
+            carry = None
+            if first is None:
+                return
+            batch = [first]
+            size = len(first)
+            deadline = loop.time() + self.interval
+            closing = False
+            while True:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                if size + len(SEPARATOR) + len(entry) > self.max_chars:
+                    carry = entry
+                    break
+                batch.append(entry)
+                size += len(SEPARATOR) + len(entry)
+            await self._send(channel, SEPARATOR.join(batch))
+            if closing:
+                return
+
+    async def _send(self, channel, content):
+        delay = 1.0
+        for attempt in range(self.retries + 1):
+            try:
+                await channel.send(content)
+                self.stats["messages"] += 1
+                return
+            except Exception as e:
+                if getattr(e, "status", None) != 429 or attempt == self.retries:
+                    self.stats["dropped"] += 1
+                    print(f"⚠️ Failed to write to #{getattr(channel, 'name', 'logs')}: {e}")
+                    return
+                self.stats["retries"] += 1
+                retry_after = getattr(e, "retry_after", None) or delay
+                await asyncio.sleep(retry_after)
+                delay = min(delay * 2, 30.0)
+
+    async def close(self):
+        """Flush every queued entry, then stop."""
+        for queue in self._queues.values():
+            queue.put_nowait(None)
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._queues.clear()
+        self._tasks.clear()
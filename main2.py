@@ -1,71 +1,118 @@
 # main.py
 import os
-import json
-import random
-import re
 import nextcord
-import requests
 from nextcord.ext import commands
 from dotenv import load_dotenv
 from datetime import datetime
 from nextcord.ui import View, Button, Modal, TextInput
 from nextcord import Interaction, TextInputStyle, ButtonStyle
+from model_router import ModelRouter
+from dice import roll as roll_formula
+from character_repo import Character, CharacterRepository, parse_character_log
+from context_window import build_context
+from history_cache import HistoryCache, HISTORY_TURNS
+from rehydration import GuildLoader
+from channels import ChannelIndex, MEMORY
+from lifecycle import run_bot
+from rules import RulesEngine
+from skill_check import SkillChecker
 
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# How far back into #logs a one-off character import looks.
+CHARACTER_IMPORT_LIMIT = int(os.getenv("CHARACTER_IMPORT_LIMIT", "1000"))
 
 intents = nextcord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
+llm = ModelRouter.from_env(OPENROUTER_API_KEY)
+history = HistoryCache()
+character_repo = CharacterRepository()
+rules_engine = RulesEngine.from_file()
+skill_checker = SkillChecker.from_file()
+character_repo.listeners.append(skill_checker.invalidate)
+channels = ChannelIndex()
 
-characters = {}
-party_members = []
-current_turn = 0
 status_effects = {}
 player_stats = {}
 
-def roll_formula(formula):
-    match = re.match(r"(\d+)d(\d+)([+-]\d+)?", formula)
-    if not match:
-        return 0
-    num_dice = int(match[1])
-    die_size = int(match[2])
-    modifier = int(match[3]) if match[3] else 0
-    rolls = [random.randint(1, die_size) for _ in range(num_dice)]
-    return sum(rolls) + modifier
-
 @bot.event
 async def on_ready():
     print(f"✅ Rift DM is online as {bot.user}!")
-
-    for guild in bot.guilds:
-        log_channel = nextcord.utils.get(guild.text_channels, name="logs")
-        if not log_channel:
-            continue
-
-        async for msg in log_channel.history(limit=200, oldest_first=True):
-            if msg.author == bot.user and msg.content.startswith("[CHARACTER LOG]"):
-                try:
-                    lines = msg.content.splitlines()
-                    user_id = lines[1].split("UserID: ")[1].strip()
-                    name = lines[2].split("Name: ")[1].strip()
-                    race = lines[3].split("Race: ")[1].strip()
-                    char_class = lines[4].split("Class: ")[1].strip()
-                    stats = json.loads(lines[5].split("Stats: ")[1].strip())
-                    passives = json.loads(lines[6].split("Passives: ")[1].strip())
-                    personality = lines[7].split("Personality: ")[1].strip()
-                    characters[user_id] = {
-                        "name": name,
-                        "race": race,
-                        "class": char_class,
-                        "stats": stats,
-                        "passives": passives,
-                        "personality": personality,
-                        "inventory": []
-                    }
-                except Exception as e:
-                    print(f"⚠️ Failed to load character from log: {e}")
+    # Guilds load lazily on their first command; this only fills in the rest
+    # in the background so the bot is usable straight away.
+    await guild_loader.warm_and_report(bot.guilds)
+
+async def load_guild(guild):
+    # Characters live in the database now; #logs is only read to import
+    # a guild that predates it.
+    log_channel = channels.get(guild)
+    if log_channel and not character_repo.is_imported(guild.id):
+        try:
+            await import_character_logs(guild, log_channel)
+        except Exception as e:
+            # An unreadable #logs mustn't keep the whole guild from loading;
+            # the import is tried again on the next start.
+            print(f"⚠️ Couldn't import character logs for {guild.name}: {e}")
+            return
+        character_repo.mark_imported(guild.id)
+
+async def prefetch_history(guild):
+    # askdm warms a cold guild's history itself; this just saves it the wait.
+    memory_channel = channels.get(guild, MEMORY)
+    if memory_channel and not history.is_warm(guild.id):
+        await warm_history(guild, memory_channel)
+
+async def import_character_logs(guild, log_channel):
+    # Newest first, so each player's latest character log is the one kept.
+    seen = set()
+    async for msg in log_channel.history(limit=CHARACTER_IMPORT_LIMIT):
+        if msg.author == bot.user and msg.content.startswith("[CHARACTER LOG]"):
+            try:
+                user_id, char = parse_character_log(msg.content)
+            except Exception as e:
+                print(f"⚠️ Failed to load character from log: {e}")
+                continue
+            if user_id not in seen:
+                seen.add(user_id)
+                character_repo.save(guild.id, user_id, char)
+
+async def warm_history(guild, memory_channel):
+    dm_logs = []
+    async for msg in memory_channel.history(limit=HISTORY_TURNS):
+        if msg.author == bot.user:
+            dm_logs.append((msg.id, msg.content))
+    dm_logs.reverse()
+    history.warm(guild.id, dm_logs)
+
+guild_loader = GuildLoader(load_guild, prefetch_history)
+
+def is_dm_log(message):
+    return (message.guild is not None and message.author == bot.user
+            and channels.is_role(message.channel, MEMORY))
+
+# Keep the history cache current so askdm never has to page through #logs.
+@bot.listen()
+async def on_message(message):
+    if is_dm_log(message):
+        history.add(message.guild.id, message.id, message.content)
+
+@bot.listen()
+async def on_raw_message_edit(payload):
+    if payload.guild_id is not None and "content" in payload.data:
+        history.edit(payload.guild_id, payload.message_id, payload.data["content"])
+
+@bot.listen()
+async def on_raw_message_delete(payload):
+    if payload.guild_id is not None:
+        history.remove(payload.guild_id, payload.message_id)
+
+@bot.listen()
+async def on_raw_bulk_message_delete(payload):
+    if payload.guild_id is not None:
+        for message_id in payload.message_ids:
+            history.remove(payload.guild_id, message_id)
 
 class CreateCharModal(Modal):
     def __init__(self):
@@ -81,34 +128,17 @@ class CreateCharModal(Modal):
         self.add_item(self.personality)
 
     async def callback(self, interaction: Interaction):
-        user_id = str(interaction.user.id)
-        characters[user_id] = {
-            "name": self.name.value,
-            "race": self.race.value,
-            "class": self.char_class.value,
-            "stats": {
-                "strength": 10,
-                "dexterity": 10,
-                "intelligence": 10
-            },
-            "passives": [],
-            "personality": self.personality.value,
-            "inventory": []
-        }
-        await interaction.response.send_message(f"✅ Character `{self.name.value}` created!", ephemeral=True)
-
-        log_channel = nextcord.utils.get(interaction.guild.text_channels, name="logs")
+        # Answer within Discord's 3s window; a cold guild's import can take longer.
+        await interaction.response.defer(ephemeral=True)
+        await guild_loader.ensure(interaction.guild)
+        user_id = interaction.user.id
+        char = Character(self.name.value, self.race.value, self.char_class.value, personality=self.personality.value)
+        character_repo.save(interaction.guild.id, user_id, char)
+        await interaction.followup.send(f"✅ Character `{self.name.value}` created!", ephemeral=True)
+
+        log_channel = channels.get(interaction.guild)
         if log_channel:
-            await log_channel.send(
-                "[CHARACTER LOG]\n"
-                f"UserID: {user_id}\n"
-                f"Name: {self.name.value}\n"
-                f"Race: {self.race.value}\n"
-                f"Class: {self.char_class.value}\n"
-                f"Stats: {json.dumps(characters[user_id]['stats'])}\n"
-                f"Passives: {json.dumps(characters[user_id]['passives'])}\n"
-                f"Personality: {self.personality.value}"
-            )
+            await log_channel.send(char.log_entry(user_id))
 
 class CreateCharButton(View):
     def __init__(self):
@@ -119,18 +149,20 @@ class CreateCharButton(View):
         await interaction.response.send_modal(CreateCharModal())
 
 @bot.command()
+@commands.guild_only()
 async def charui(ctx):
     await ctx.send("Click below to create your character:", view=CreateCharButton())
 
 @bot.command()
+@commands.guild_only()
 async def inventory(ctx):
-    user_id = str(ctx.author.id)
-    char = characters.get(user_id)
+    await guild_loader.ensure(ctx.guild)
+    char = character_repo.get(ctx.guild.id, ctx.author.id)
     if not char:
         await ctx.send("You haven't created a character yet.")
         return
 
-    inv_items = char.get("inventory", [])
+    inv_items = char.inventory
     if not inv_items:
         await ctx.send("Your inventory is empty.")
         return
@@ -144,73 +176,74 @@ async def inventory(ctx):
     await ctx.send("Your Inventory:", view=InventoryView(inv_items))
 
 @bot.command()
+@commands.guild_only()
 async def askdm(ctx, *, prompt: str):
-    user_id = str(ctx.author.id)
-    d20_bonus = 0
-    char = characters.get(user_id)
+    await guild_loader.ensure(ctx.guild)
+    char = character_repo.get(ctx.guild.id, ctx.author.id)
+    blocked = skill_checker.check(ctx.guild.id, ctx.author.id, char, prompt)
+    if blocked:
+        await ctx.send(f"🚫 {char.name} {blocked.reason}.")
+        return
+    d20_bonus, _ = rules_engine.bonus(char, prompt)
 
     if char:
-        if "Ambidextrous" in char.get("passives", []) and "hands" in prompt:
-            d20_bonus += 2
-        personality = char.get("personality", "")
-        char_desc = f"You are {char['name']}, a {char['race']} {char['class']} with a {personality} personality."
+        char_desc = f"You are {char.name}, a {char.race} {char.char_class} with a {char.personality} personality."
     else:
         char_desc = "You are an unnamed adventurer."
 
-    roll_result = roll_formula("2d6+{0}".format(d20_bonus))
+    roll_result = roll_formula("2d6{0:+d}".format(d20_bonus))
     await ctx.send(f"You rolled a **{roll_result}** on your action.")
 
     system_prompt = (
         "Assume the role of an expert fantasy writer that specializes in interactive fiction..."
     )
 
-    log_channel = nextcord.utils.get(ctx.guild.text_channels, name="logs")
-    quest_id = 1
-    memory_messages = []
-
-    if log_channel:
-        async for msg in log_channel.history(limit=50, oldest_first=True):
-            if msg.author == bot.user and "**DM Reply:**" in msg.content:
-                try:
-                    quest_line = int(msg.content.split("Quest ID: #")[1].split("\n")[0])
-                    if quest_line >= quest_id:
-                        quest_id = quest_line + 1
-                    user_input = msg.content.split("Prompt:** ")[1].split("\n**DM Reply:**")[0]
-                    bot_reply = msg.content.split("**DM Reply:** ")[1]
-                    memory_messages.append({"role": "user", "content": user_input})
-                    memory_messages.append({"role": "assistant", "content": bot_reply})
-                except:
-                    continue
-
-    messages = [{"role": "system", "content": system_prompt}] + memory_messages
-    messages.append({"role": "user", "content": f"{char_desc} {prompt} (Roll: {roll_result})"})
-
-    payload = {
-        "model": "mistralai/mistral-7b-instruct",
-        "messages": messages
-    }
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    memory_channel = channels.get(ctx.guild, MEMORY)
+    if memory_channel and not history.is_warm(ctx.guild.id):
+        await warm_history(ctx.guild, memory_channel)
+    quest_id = history.next_quest_id(ctx.guild.id)
+    memory_messages = history.memory_messages(ctx.guild.id)
+
+    messages = build_context(
+        system_prompt, memory_messages, f"{char_desc} {prompt} (Roll: {roll_result})", llm.model
+    )
 
     try:
-        res = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload)
-        data = res.json()
-        reply = data['choices'][0]['message']['content'].strip()
+        reply = await llm.complete(messages)
         await ctx.send(f"**DM Reply:** {reply}")
 
         timestamp = datetime.now().strftime("%B %d, %Y – %I:%M %p")
-        if log_channel:
-            await log_channel.send(
+        if memory_channel:
+            log_msg = await memory_channel.send(
                 f"Quest ID: #{quest_id}\n"
                 f"Timestamp: {timestamp}\n"
                 f"Prompt:** {prompt} (Roll: {roll_result})\n"
                 f"**DM Reply:** {reply}"
             )
+            history.add(ctx.guild.id, log_msg.id, log_msg.content)
 
     except Exception as e:
         await ctx.send(f"❌ Bot error: {str(e)}")
 
-bot.run(DISCORD_TOKEN)
+@bot.listen()
+async def on_guild_channel_create(channel):
+    channels.channel_changed(channel)
+
+@bot.listen()
+async def on_guild_channel_update(before, after):
+    channels.channel_changed(before)
+    channels.channel_changed(after)
+
+@bot.listen()
+async def on_guild_channel_delete(channel):
+    channels.channel_changed(channel)
+
+@bot.listen()
+async def on_guild_remove(guild):
+    channels.forget(guild.id)
+
+async def shutdown():
+    await llm.close()
+    character_repo.close()
+
+run_bot(bot, DISCORD_TOKEN, shutdown)
@@ -0,0 +1,253 @@
+# metrics.py
+import contextvars
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from aiohttp import web
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))    # 0 = no endpoint
+TRACE_REQUESTS = os.getenv("TRACE_REQUESTS", "0") == "1"
+TRACE_KEEP = 200
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Counter:
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in self._values.items():
+            yield f"{self.name}{_labels(dict(zip(self.label_names, key)))} {value}"
+
+
+class Histogram:
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        for key, series in self._series.items():
+            labels = dict(zip(self.label_names, key))
+            for bound, count in zip(self.buckets, series):
+                yield f"{self.name}_bucket{_labels({**labels, 'le': bound})} {count}"
+            yield f"{self.name}_bucket{_labels({**labels, 'le': '+Inf'})} {series[-1]}"
+            yield f"{self.name}_sum{_labels(labels)} {series[-2]}"
+            yield f"{self.name}_count{_labels(labels)} {series[-1]}"
+
+
+class Collected:
+    """Values read at scrape time: `fn()` returns [(labels dict, value), ...]."""
+
+    def __init__(self, name, description, kind, fn):
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self.fn = fn
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self.fn():
+            if value is not None:
+                yield f"{self.name}{_labels(labels)} {value}"
+
+
+class Registry:
+    """Prometheus text-format metrics without a client library.
+
+    Counters and histograms are updated in place; everything the bot's
+    components already count in their `stats` dicts is read at scrape time
+    through `collect()` / `stats()` instead of being duplicated.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, description, labels=()):
+        metric = Counter(name, description, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, description, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self, name, description, fn, kind="gauge"):
+        self._metrics.append(Collected(name, description, kind, fn))
+
+    def stats(self, name, description, stats, label="event"):
+        """Expose a component's `stats` dict as one counter labelled by key."""
+        self.collect(name, description, lambda: [({label: k}, v) for k, v in stats.items()], kind="counter")
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+COMMAND_LATENCY = REGISTRY.histogram(
+    "riftdm_command_seconds", "Time from command invocation to completion.", ("command", "status")
+)
+DISCORD_REQUESTS = REGISTRY.counter(
+    "riftdm_discord_requests_total", "Discord REST calls by method, route and outcome.", ("method", "route", "status")
+)
+# kind="429" is Discord turning a request away (nextcord retries it, so
+# DISCORD_REQUESTS never sees it); kind="exhausted" is a bucket merely used up.
+DISCORD_RATELIMITS = REGISTRY.counter(
+    "riftdm_discord_ratelimits_total", "Discord rate-limit events by kind (exhausted bucket or 429) and scope.",
+    ("kind", "scope")
+)
+
+
+def instrument_http(http):
+    """Count every REST call nextcord makes through `http` (a bot's `bot.http`)."""
+    request = http.request
+
+    async def counted(route, **kwargs):
+        try:
+            result = await request(route, **kwargs)
+        except Exception as e:
+            DISCORD_REQUESTS.inc(method=route.method, route=route.path, status=getattr(e, "status", "error"))
+            raise
+        DISCORD_REQUESTS.inc(method=route.method, route=route.path, status="ok")
+        return result
+
+    http.request = counted
+
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    __slots__ = ("name", "started", "spans", "duration")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.spans = []
+        self.duration = None
+
+    def summary(self):
+        steps = " → ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.spans)
+        return f"{self.name} {self.duration * 1000:.0f}ms" + (f": {steps}" if steps else "")
+
+
+@contextmanager
+def span(name):
+    """Time one step of the current command's trace; a no-op outside a traced command."""
+    trace = _current.get()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.spans.append((name, time.monotonic() - started))
+
+
+class Tracer:
+    """Per-command traces: `start()` in a before-invoke hook, `finish()` after it."""
+
+    def __init__(self, enabled=TRACE_REQUESTS, keep=TRACE_KEEP):
+        self.enabled = enabled
+        self.recent = deque(maxlen=keep)
+
+    def start(self, name):
+        trace = Trace(name)
+        _current.set(trace)
+        return trace
+
+    def finish(self, status="ok"):
+        trace = _current.get()
+        if trace is None:
+            return None
+        _current.set(None)
+        trace.duration = time.monotonic() - trace.started
+        COMMAND_LATENCY.observe(trace.duration, command=trace.name, status=status)
+        if self.enabled:
+            self.recent.append({"command": trace.name, "status": status, "seconds": trace.duration,
+                                "spans": [{"name": n, "seconds": s} for n, s in trace.spans]})
+            print(f"🔎 {trace.summary()}")
+        return trace
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /traces (recent traces as JSON)."""
+
+    def __init__(self, registry=REGISTRY, tracer=None, host=METRICS_HOST, port=METRICS_PORT):
+        self.registry = registry
+        self.tracer = tracer
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _metrics(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def _traces(self, request):
+        traces = list(self.tracer.recent) if self.tracer else []
+        return web.Response(text=json.dumps(traces), content_type="application/json")
+
+    async def start(self):
+        if not self.port or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/traces", self._traces)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,215 @@
+# model_router.py
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from llm_client import LLMClient, LLMError, OPENROUTER_URL, DEFAULT_MODEL
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "100"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+ROUTER_COOLDOWN = float(os.getenv("ROUTER_COOLDOWN", "30"))
+# Until a backend has enough samples for a p95, fail over after this long.
+ROUTER_DEADLINE = float(os.getenv("ROUTER_DEADLINE", "20"))
+
+
+class LatencyWindow:
+    """Rolling window of the last `size` request outcomes for one backend."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, size=ROUTER_WINDOW):
+        self.samples = deque(maxlen=size)
+
+    def record(self, seconds, ok=True):
+        self.samples.append((ok, seconds))
+
+    def percentile(self, pct):
+        times = sorted(seconds for ok, seconds in self.samples if ok)
+        if not times:
+            return None
+        return times[min(len(times) - 1, int(len(times) * pct / 100))]
+
+    def error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class Backend:
+    """One OpenAI-compatible endpoint serving one model."""
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+        self.latency = LatencyWindow()
+        self.first_token = LatencyWindow()
+        self.cooldown_until = 0.0
+
+    @property
+    def model(self):
+        return self.client.model
+
+    def healthy(self, now):
+        return now >= self.cooldown_until
+
+    def record(self, window, seconds, ok):
+        window.record(seconds, ok)
+        if not ok and len(window) >= ROUTER_MIN_SAMPLES and window.error_rate() >= ROUTER_MAX_ERROR_RATE:
+            self.cooldown_until = time.monotonic() + ROUTER_COOLDOWN
+
+    def deadline(self, window=None):
+        """Seconds to wait on this backend before starting the next one."""
+        window = self.latency if window is None else window
+        if len(window) < ROUTER_MIN_SAMPLES:
+            return ROUTER_DEADLINE
+        return window.percentile(95) or ROUTER_DEADLINE
+
+    def snapshot(self):
+        return {
+            "model": self.model,
+            "p50": self.latency.percentile(50),
+            "p95": self.latency.percentile(95),
+            "first_token_p95": self.first_token.percentile(95),
+            "error_rate": self.latency.error_rate(),
+            "healthy": self.healthy(time.monotonic()),
+        }
+
+
+class ModelRouter:
+    """Drop-in for LLMClient that spreads completions over several backends.
+
+    Each request goes to the healthy backend with the lowest rolling p50
+    (one with no samples yet is tried first, so a new backend gets measured).
+    A backend whose recent error rate crosses ROUTER_MAX_ERROR_RATE sits out
+    for ROUTER_COOLDOWN seconds. If the chosen backend errors, or is still
+    running past its own p95, the next one is started and the first answer
+    wins; the other request is cancelled.
+    """
+
+    def __init__(self, backends):
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+        self.backends = backends
+        self.stats = {"requests": 0, "failovers": 0, "slow_failovers": 0}
+
+    @classmethod
+    def from_env(cls, api_key):
+        """Read LLM_BACKENDS, a JSON list of {"name", "url", "model", "api_key_env"}.
+
+        Without it this is the old single OpenRouter client.
+        """
+        config = os.getenv("LLM_BACKENDS")
+        if not config:
+            return cls([Backend("openrouter", LLMClient(api_key))])
+        backends = []
+        for entry in json.loads(config):
+            key = os.getenv(entry["api_key_env"]) if entry.get("api_key_env") else api_key
+            client = LLMClient(key, url=entry.get("url", OPENROUTER_URL), model=entry.get("model", DEFAULT_MODEL))
+            backends.append(Backend(entry.get("name") or client.model, client))
+        return cls(backends)
+
+    @property
+    def model(self):
+        """Model of the backend the next request would go to."""
+        return self._order(None, "latency")[0].model
+
+    def _order(self, model, window):
+        now = time.monotonic()
+        candidates = [b for b in self.backends if model is None or b.model == model] or self.backends
+        healthy = [b for b in candidates if b.healthy(now)] or candidates
+
+        def speed(backend):
+            samples = getattr(backend, window)
+            if window == "first_token" and not len(samples):
+                samples = backend.latency
+            p50 = samples.percentile(50)
+            if p50 is None:
+                # Unmeasured goes first; failing every time goes last.
+                return float("inf") if len(samples) else 0.0
+            return p50
+
+        return sorted(healthy, key=speed)
+
+    async def _timed(self, backend, messages, params):
+        started = time.monotonic()
+        try:
+            result = await backend.client.complete(messages, **params)
+        except LLMError:
+            backend.record(backend.latency, time.monotonic() - started, ok=False)
+            raise
+        except asyncio.CancelledError:
+            # Lost to another backend: at least this slow, so count it.
+            backend.record(backend.latency, time.monotonic() - started, ok=True)
+            raise
+        backend.record(backend.latency, time.monotonic() - started, ok=True)
+        return result
+
+    async def complete(self, messages, model=None, **params):
+        self.stats["requests"] += 1
+        order = self._order(model, "latency")
+        running = {}
+        errors = []
+
+        def launch():
+            backend = order[len(running) + len(errors)]
+            running[asyncio.ensure_future(self._timed(backend, messages, params))] = backend
+            return backend
+
+        deadline = launch().deadline()
+        try:
+            while running:
+                spare = len(running) + len(errors) < len(order)
+                done, _ = await asyncio.wait(running, timeout=deadline if spare else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.stats["slow_failovers"] += 1
+                    deadline = launch().deadline()
+                    continue
+                for task in done:
+                    backend = running.pop(task)
+                    try:
+                        return task.result()
+                    except LLMError as e:
+                        errors.append(f"{backend.name}: {e}")
+                if len(running) + len(errors) < len(order):
+                    self.stats["failovers"] += 1
+                    deadline = launch().deadline()
+            raise LLMError("; ".join(errors))
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def stream(self, messages, model=None, **params):
+        """Stream from the fastest backend, failing over only before the first delta."""
+        self.stats["requests"] += 1
+        errors = []
+        for backend in self._order(model, "first_token"):
+            started = time.monotonic()
+            streaming = False
+            try:
+                async for delta in backend.client.stream(messages, **params):
+                    if not streaming:
+                        streaming = True
+                        backend.record(backend.first_token, time.monotonic() - started, ok=True)
+                    yield delta
+            except LLMError as e:
+                backend.record(backend.latency, time.monotonic() - started, ok=False)
+                if streaming:
+                    raise
+                errors.append(f"{backend.name}: {e}")
+                self.stats["failovers"] += 1
+                continue
+            backend.record(backend.latency, time.monotonic() - started, ok=True)
+            return
+        raise LLMError("; ".join(errors))
+
+    def snapshot(self):
+        return {backend.name: backend.snapshot() for backend in self.backends}
+
+    async def close(self):
+        await asyncio.gather(*(backend.client.close() for backend in self.backends))
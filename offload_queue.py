@@ -0,0 +1,118 @@
+# offload_queue.py
+import json
+import os
+import time
+from db import connect
+
+OFFLOAD_LEASE = float(os.getenv("OFFLOAD_LEASE", "300"))
+OFFLOAD_MAX_ATTEMPTS = int(os.getenv("OFFLOAD_MAX_ATTEMPTS", "2"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gen_jobs (
+    id INTEGER PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    channel_id INTEGER,
+    message_id INTEGER,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS gen_jobs_ready ON gen_jobs (status, priority, id);
+CREATE INDEX IF NOT EXISTS gen_jobs_message ON gen_jobs (message_id);
+CREATE INDEX IF NOT EXISTS gen_jobs_channel ON gen_jobs (channel_id, status);
+"""
+
+
+class OffloadQueue:
+    """Generation jobs shared between the gateway and `gen_worker.py` processes.
+
+    Lives in the bot's SQLite database, so it needs no extra service. The
+    gateway only `put()`s; workers `claim()` the most urgent queued job under
+    a lease. A job whose worker died is handed out again once the lease
+    runs out, up to OFFLOAD_MAX_ATTEMPTS times. Only one job per channel
+    runs at a time, so each turn is built on top of the one before it.
+    """
+
+    def __init__(self, path=None, lease=OFFLOAD_LEASE, max_attempts=OFFLOAD_MAX_ATTEMPTS):
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    def put(self, payload, priority, message_id=None):
+        cur = self.conn.execute(
+            "INSERT INTO gen_jobs (priority, channel_id, message_id, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (priority, payload["channel_id"], message_id, json.dumps(payload), time.time())
+        )
+        return cur.lastrowid
+
+    def position(self, job_id):
+        """1-based place among queued jobs; 0 once a worker has it."""
+        row = self.conn.execute("SELECT status, priority FROM gen_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0] != "queued":
+            return 0
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM gen_jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND id <= ?))",
+            (row[1], row[1], job_id)
+        ).fetchone()[0]
+
+    def depth(self):
+        return self.conn.execute("SELECT COUNT(*) FROM gen_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def cancel_message(self, message_id):
+        """Drop a job that no worker has started yet (its command message was deleted)."""
+        cur = self.conn.execute(
+            "UPDATE gen_jobs SET status = 'cancelled' WHERE message_id = ? AND status = 'queued'", (message_id,)
+        )
+        return cur.rowcount > 0
+
+    def claim(self, worker):
+        """Take the next job as (job_id, payload), or None if there is nothing to do.
+
+        Jobs for a channel that already has one running are skipped until it finishes.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases go back to the queue, or fail once out of attempts.
+            self.conn.execute(
+                "UPDATE gen_jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = 'worker lease expired' WHERE status = 'running' AND lease_until < ?",
+                (self.max_attempts, now)
+            )
+            row = self.conn.execute(
+                "SELECT id, payload FROM gen_jobs AS q WHERE status = 'queued' AND NOT EXISTS ("
+                "SELECT 1 FROM gen_jobs AS r WHERE r.channel_id = q.channel_id AND r.status = 'running'"
+                ") ORDER BY priority, id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE gen_jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ? "
+                    "WHERE id = ?",
+                    (worker, now + self.lease, row[0])
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return (row[0], json.loads(row[1])) if row else None
+
+    def finish(self, job_id, error=None):
+        self.conn.execute(
+            "UPDATE gen_jobs SET status = ?, error = ?, lease_until = NULL WHERE id = ?",
+            ("failed" if error else "done", error, job_id)
+        )
+
+    def purge(self, older_than=24 * 60 * 60):
+        """Delete finished jobs older than `older_than` seconds."""
+        self.conn.execute(
+            "DELETE FROM gen_jobs WHERE status IN ('done', 'failed', 'cancelled') AND created_at < ?",
+            (time.time() - older_than,)
+        )
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,72 @@
+# prompt_prefix.py
+import json
+from collections import OrderedDict
+from functools import lru_cache
+from context_window import count_tokens, MESSAGE_OVERHEAD
+
+SYSTEM_PROMPT = (
+    "Assume the role of an expert fantasy writer that specializes in interactive fiction. "
+    "Your job is to respond to fantasy roleplay prompts with vivid, descriptive, immersive responses, "
+    "including what the player sees, feels, and what NPCs might do. Avoid meta-commentary."
+)
+PREFIX_CACHE_SIZE = 10_000
+
+
+class CachedMessage(dict):
+    """A chat message whose JSON encoding and token count are computed once.
+
+    Treat it as read-only: `LLMClient` sends `encoded` as-is instead of
+    serializing the dict again.
+    """
+
+    __slots__ = ("encoded", "tokens")
+
+    def __init__(self, role, content):
+        super().__init__(role=role, content=content)
+        self.encoded = json.dumps(self)
+        self.tokens = count_tokens(content) + MESSAGE_OVERHEAD
+
+
+def character_preamble(char):
+    if char:
+        return f"You are {char.name}, a {char.race} {char.char_class} with a {char.personality} personality."
+    return "You are an unnamed adventurer."
+
+
+@lru_cache(maxsize=1024)
+def prefix_message(system_prompt, preamble):
+    """The prefix for a character snapshot, for processes that get no change events."""
+    return CachedMessage("system", f"{system_prompt}\n\n{preamble}")
+
+
+class PromptPrefixes:
+    """Precomputed system message (system prompt + character preamble) per player.
+
+    The prefix is the first message of every request and stays byte-for-byte
+    the same until the character changes, so providers with prompt caching
+    can reuse it. Register `invalidate` with the character repository to drop
+    an entry when that player's character is saved or deleted.
+    """
+
+    def __init__(self, system_prompt=SYSTEM_PROMPT, maxsize=PREFIX_CACHE_SIZE):
+        self.system_prompt = system_prompt
+        self.maxsize = maxsize
+        self._prefixes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, guild_id, user_id, char):
+        key = (guild_id, user_id)
+        prefix = self._prefixes.get(key)
+        if prefix is not None:
+            self._prefixes.move_to_end(key)
+            self.hits += 1
+            return prefix
+        self.misses += 1
+        prefix = self._prefixes[key] = CachedMessage("system", f"{self.system_prompt}\n\n{character_preamble(char)}")
+        if len(self._prefixes) > self.maxsize:
+            self._prefixes.popitem(last=False)
+        return prefix
+
+    def invalidate(self, guild_id, user_id):
+        self._prefixes.pop((guild_id, user_id), None)
@@ -0,0 +1,125 @@
+# rate_limit.py
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+
+def parse_rate(spec):
+    """Parse "N/S" (N requests per S seconds, bursting to N) into (capacity, per_second)."""
+    count, _, seconds = spec.partition("/")
+    return float(count), float(count) / float(seconds or 1)
+
+
+RATE_LIMIT_USER = parse_rate(os.getenv("RATE_LIMIT_USER", "5/60"))
+RATE_LIMIT_GUILD = parse_rate(os.getenv("RATE_LIMIT_GUILD", "30/60"))
+RATE_LIMIT_MODEL = parse_rate(os.getenv("RATE_LIMIT_MODEL", "120/60"))
+MAX_QUEUED_PER_USER = int(os.getenv("MAX_QUEUED_PER_USER", "1"))
+MAX_BUCKETS = 50_000
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "stamp")
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, now):
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class UserBusy(Exception):
+    """The user already has a prompt running and the queue behind it is full."""
+
+
+class RateLimiter:
+    """Token buckets per user, per guild and per upstream model, plus per-user coalescing.
+
+    `check()` only spends tokens when every scope has one, so a request
+    rejected at the guild level does not also eat into the user's budget.
+    `one_at_a_time()` runs a user's prompts back to back instead of in
+    parallel and rejects any beyond `max_queued` waiting ones; it decides
+    queue vs reject in one place, so a caller tells the user exactly one of
+    the two.
+    """
+
+    def __init__(self, user=RATE_LIMIT_USER, guild=RATE_LIMIT_GUILD, model=RATE_LIMIT_MODEL,
+                 max_queued=MAX_QUEUED_PER_USER):
+        self.limits = {"user": user, "guild": guild, "model": model}
+        self.max_queued = max_queued
+        self._buckets = OrderedDict()
+        self._running = {}
+        self.counters = {"allowed": 0, "limited_user": 0, "limited_guild": 0, "limited_model": 0,
+                         "queued": 0, "rejected_busy": 0}
+
+    def _bucket(self, scope, key):
+        full_key = (scope, key)
+        bucket = self._buckets.get(full_key)
+        if bucket is None:
+            bucket = self._buckets[full_key] = TokenBucket(*self.limits[scope])
+            if len(self._buckets) > MAX_BUCKETS:
+                # The oldest bucket has been idle the longest and has refilled.
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(full_key)
+        return bucket
+
+    def check(self, user_id, guild_id, model):
+        """Spend one token in each scope, or return (scope, retry_after) for the first that is empty."""
+        now = time.monotonic()
+        buckets = [("user", self._bucket("user", user_id)),
+                   ("guild", self._bucket("guild", guild_id)),
+                   ("model", self._bucket("model", model))]
+        for scope, bucket in buckets:
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                self.counters[f"limited_{scope}"] += 1
+                return scope, wait
+        for _, bucket in buckets:
+            bucket.take()
+        self.counters["allowed"] += 1
+        return None
+
+    @asynccontextmanager
+    async def one_at_a_time(self, user_id, on_queued=None):
+        """Hold the user's slot for the block.
+
+        Raises UserBusy if the queue behind the running prompt is full;
+        otherwise, if it has to wait, awaits `on_queued()` first.
+        """
+        state = self._running.get(user_id)
+        if state is None:
+            state = self._running[user_id] = [asyncio.Lock(), 0]
+        lock = state[0]
+        queued = lock.locked()
+        if queued:
+            if state[1] >= self.max_queued:
+                self.counters["rejected_busy"] += 1
+                raise UserBusy()
+            self.counters["queued"] += 1
+        state[1] += 1
+        try:
+            if queued and on_queued is not None:
+                await on_queued()
+            await lock.acquire()
+        finally:
+            state[1] -= 1
+        try:
+            yield
+        finally:
+            lock.release()
+            if state[1] == 0 and self._running.get(user_id) is state:
+                del self._running[user_id]
@@ -0,0 +1,99 @@
+# rehydration.py
+import asyncio
+import os
+import time
+
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+WARMUP_REPORT_INTERVAL = float(os.getenv("WARMUP_REPORT_INTERVAL", "30"))
+
+
+class GuildLoader:
+    """Loads per-guild state once, on first use or from a background warmup.
+
+    `ensure(guild)` is what commands await: it returns at once for a guild
+    that is already loaded, joins an in-flight load for that guild only, and
+    otherwise loads it right there. `warm(guilds)` schedules the rest as
+    background tasks limited to `concurrency` at a time, so a command never
+    waits behind another guild's warmup. Keep `load` to what commands
+    actually need; slower work that only makes later commands faster goes
+    in `prefetch`, which warmup runs after `load` and commands never wait on.
+    """
+
+    def __init__(self, load, prefetch=None, concurrency=WARMUP_CONCURRENCY):
+        self._load = load
+        self._prefetch = prefetch
+        self._limit = asyncio.Semaphore(concurrency)
+        self._loaded = set()
+        self._active = {}
+        self._waiting = 0
+        self.stats = {"loaded": 0, "failed": 0, "queued": 0, "on_demand": 0, "load_seconds": 0.0}
+
+    def is_loaded(self, guild_id):
+        return guild_id in self._loaded
+
+    async def ensure(self, guild):
+        if guild.id in self._loaded:
+            return
+        task = self._active.get(guild.id)
+        if task is None:
+            # Not loading yet (maybe still queued for warmup): load it now
+            # rather than waiting for a warmup slot.
+            self.stats["on_demand"] += 1
+            task = self._spawn(guild)
+        # shield: a cancelled command must not abort a load others may share.
+        await asyncio.shield(task)
+
+    def warm(self, guilds):
+        """Queue every not-yet-loaded guild for background loading.
+
+        Returns a future that finishes when the whole batch has been tried.
+        """
+        queued = [g for g in guilds if g.id not in self._loaded and g.id not in self._active]
+        self.stats["queued"] += len(queued)
+        self._waiting += len(queued)
+        return asyncio.gather(*(self._warm_one(g) for g in queued), return_exceptions=True)
+
+    async def warm_and_report(self, guilds, interval=WARMUP_REPORT_INTERVAL):
+        """`warm(guilds)`, printing progress every `interval` seconds until it is done."""
+        warmup = self.warm(guilds)
+        while not warmup.done():
+            await asyncio.wait([warmup], timeout=interval)
+            if not warmup.done():
+                print(f"⏳ Warmup: {self.progress()}")
+        print(f"✅ Warmup finished: {self.progress()}")
+
+    def forget(self, guild_id):
+        self._loaded.discard(guild_id)
+
+    def progress(self):
+        return (f"{self.stats['loaded']} guilds loaded ({self.stats['on_demand']} on demand), "
+                f"{len(self._active)} loading, {self._waiting} still warming, {self.stats['failed']} failed")
+
+    async def _warm_one(self, guild):
+        try:
+            async with self._limit:
+                if guild.id not in self._loaded:
+                    await (self._active.get(guild.id) or self._spawn(guild))
+            # Separate slot, so guilds still waiting to load go ahead of prefetches.
+            if self._prefetch is not None:
+                async with self._limit:
+                    await self._prefetch(guild)
+        finally:
+            self._waiting -= 1
+
+    def _spawn(self, guild):
+        task = asyncio.create_task(self._timed_load(guild))
+        self._active[guild.id] = task
+        task.add_done_callback(lambda _: self._active.pop(guild.id, None))
+        return task
+
+    async def _timed_load(self, guild):
+        started = time.perf_counter()
+        try:
+            await self._load(guild)
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        self._loaded.add(guild.id)
+        self.stats["loaded"] += 1
+        self.stats["load_seconds"] += time.perf_counter() - started
@@ -0,0 +1,105 @@
+# response_cache.py
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from dice import judgment
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+
+# Prompts that only observe the scene; anything that changes it always goes upstream.
+OBSERVE_VERBS = {
+    "look", "looks", "inspect", "inspects", "examine", "examines", "check", "checks",
+    "observe", "observes", "search", "searches", "scan", "scans", "survey", "surveys",
+    "peek", "peeks", "peer", "peers", "glance", "glances", "listen", "listens", "study", "studies",
+}
+FILLER = {"i", "we", "my", "character", "carefully", "quickly", "slowly", "again", "just", "then", "try", "to"}
+
+_words = re.compile(r"[a-z0-9']+")
+
+
+def normalize_prompt(prompt):
+    """Lowercase, drop punctuation and filler so "I look around." == "look around"."""
+    return " ".join(w for w in _words.findall(prompt.lower()) if w not in FILLER)
+
+
+def is_observation(prompt):
+    words = normalize_prompt(prompt).split()
+    return bool(words) and words[0] in OBSERVE_VERBS
+
+
+def roll_bucket(roll):
+    """Collapse a roll into the same judgment bands the DM narrates by."""
+    return judgment(roll)
+
+
+class ResponseCache:
+    """Opt-in TTL + LRU cache of DM replies for repeated observation prompts.
+
+    Keys cover everything that shapes the narration: model, guild and
+    channel, the context messages sent ahead of the prompt (prompt prefix,
+    story summary, recent turns), the normalized prompt and the roll's
+    judgment band. Earlier observation turns are left out of the key since
+    they don't change the scene, so "look around" twice in the same room
+    hits, while any other turn in between misses. `key_for` returns None
+    whenever the cache is off or the prompt is not a pure observation, and
+    `get`/`put` ignore a None key, so uncached requests take exactly the old
+    path.
+    """
+
+    def __init__(self, enabled=RESPONSE_CACHE, ttl=RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, model, guild_id, channel_id, context, prompt, roll):
+        if not self.enabled or not is_observation(prompt):
+            return None
+        parts = [model, str(guild_id), str(channel_id)]
+        observing = False
+        for message in context:
+            if message["role"] == "user":
+                observing = is_observation(message["content"])
+            elif message["role"] != "assistant":
+                observing = False
+            if not observing:
+                parts.append(message["role"])
+                parts.append(message["content"])
+        parts.append(normalize_prompt(prompt))
+        parts.append(roll_bucket(roll))
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.digest()
+
+    def get(self, key):
+        if key is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, reply):
+        if key is None or not reply:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
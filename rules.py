@@ -0,0 +1,97 @@
+# rules.py
+import json
+import os
+import re
+
+RULES_PATH = os.getenv("RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json"))
+
+
+class Rule:
+    __slots__ = ("name", "kind", "bonus", "keywords")
+
+    def __init__(self, name, kind, bonus, keywords):
+        self.name = name
+        self.kind = kind
+        # Added to a dice roll, so a whole number.
+        self.bonus = int(bonus)
+        self.keywords = tuple(k.casefold() for k in keywords)
+
+
+def keyword_pattern(words):
+    """One regex for all `words`, factored by shared prefixes.
+
+    Each step only chooses between the next characters that some keyword
+    actually continues with, so the match cost tracks the prompt, not the
+    number of keywords.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class RulesEngine:
+    """Roll bonuses from passives and skills, loaded from rules.json.
+
+    A keyword matches at the start of a word ("pick" also fires on "picks"
+    and "picking"), case-insensitively. All keywords are compiled into one
+    matcher and each maps straight to the rules it triggers, so scoring a
+    prompt is one scan plus a set lookup per hit.
+    """
+
+    def __init__(self, rules):
+        self.rules = {rule.name: rule for rule in rules}
+        exact = {}
+        for rule in rules:
+            for keyword in rule.keywords:
+                exact.setdefault(keyword, []).append(rule)
+        # A match on "pick the lock" is also a match on "pick".
+        self._by_keyword = {
+            keyword: tuple(rule for i in range(1, len(keyword) + 1) for rule in exact.get(keyword[:i], ()))
+            for keyword in exact
+        }
+        pattern = keyword_pattern(sorted(exact))
+        # Lookahead so overlapping keywords ("sleight of hand", "hand") are all found.
+        self._matcher = re.compile(rf"(?=\b({pattern}))", re.IGNORECASE) if exact else None
+
+    @classmethod
+    def from_file(cls, path=RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rules = []
+        for kind, key in (("passive", "passives"), ("skill", "skills")):
+            for name, spec in data.get(key, {}).items():
+                rules.append(Rule(name, kind, spec["bonus"], spec["keywords"]))
+        return cls(rules)
+
+    def applicable(self, char, prompt):
+        """The rules that `char` has and `prompt` triggers, each at most once."""
+        if char is None or self._matcher is None:
+            return []
+        owned = set(char.passives)
+        owned.update(char.skills)
+        if not owned:
+            return []
+        fired = {}
+        for match in self._matcher.finditer(prompt):
+            # IGNORECASE also matches variants like "ſneak"; casefold maps them back.
+            for rule in self._by_keyword.get(match.group(1).casefold(), ()):
+                if rule.name in owned:
+                    fired[rule.name] = rule
+        return list(fired.values())
+
+    def bonus(self, char, prompt):
+        """(total bonus, rules applied)."""
+        rules = self.applicable(char, prompt)
+        return sum(rule.bonus for rule in rules), rules
@@ -0,0 +1,66 @@
+# sessions.py
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", str(6 * 60 * 60)))
+
+
+class PartySession:
+    """Turn order for one table (a guild channel)."""
+
+    __slots__ = ("members", "current_turn", "lock", "last_used")
+
+    def __init__(self):
+        self.members = []
+        self.current_turn = 0
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def reset(self):
+        self.members = []
+        self.current_turn = 0
+
+
+class SessionRegistry:
+    """Party sessions keyed by (guild_id, channel_id).
+
+    Sessions are kept in last-used order, so idle ones sit at the front and
+    are dropped in passing on each lookup without a sweep over every table.
+    Hold `session.lock` while reading and updating a session so two
+    `!nextturn`s in the same channel cannot both advance from the same turn.
+    """
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, guild_id, channel_id):
+        now = time.monotonic()
+        self._evict_idle(now)
+        key = (guild_id, channel_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = PartySession()
+        else:
+            self._sessions.move_to_end(key)
+        session.last_used = now
+        return session
+
+    def find(self, guild_id, channel_id):
+        """Return the channel's session without creating one or marking it used."""
+        return self._sessions.get((guild_id, channel_id))
+
+    def end(self, guild_id, channel_id):
+        self._sessions.pop((guild_id, channel_id), None)
+
+    def _evict_idle(self, now):
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_timeout or session.lock.locked():
+                return
+            del self._sessions[key]
@@ -0,0 +1,92 @@
+# sharding.py
+import asyncio
+import json
+import math
+import os
+import time
+from collections import Counter
+
+# Set by launcher.py for each worker; unset means one process that lets
+# Discord pick the shard count.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()]
+WORKER_ID = int(os.getenv("WORKER_ID", "0"))
+SHARD_STATUS_DIR = os.getenv("SHARD_STATUS_DIR", ".shards")
+SHARD_REPORT_INTERVAL = float(os.getenv("SHARD_REPORT_INTERVAL", "15"))
+
+
+def shard_options():
+    """Keyword arguments for `commands.AutoShardedBot` from the environment."""
+    if not SHARD_COUNT:
+        return {}
+    options = {"shard_count": SHARD_COUNT}
+    if SHARD_IDS:
+        options["shard_ids"] = SHARD_IDS
+    return options
+
+
+def status_path(worker_id, directory=SHARD_STATUS_DIR):
+    return os.path.join(directory, f"worker{worker_id}.json")
+
+
+class ShardReporter:
+    """Writes this worker's per-shard load to a small JSON file for the launcher.
+
+    A guild only ever lives on one shard, and each shard on one worker, so
+    every worker sees only its own guilds' parties, caches and queues.
+    """
+
+    def __init__(self, bot, worker_id=WORKER_ID, directory=SHARD_STATUS_DIR, interval=SHARD_REPORT_INTERVAL):
+        self.bot = bot
+        self.worker_id = worker_id
+        self.directory = directory
+        self.interval = interval
+        self.commands = Counter()
+        self._task = None
+
+    def count(self, guild):
+        if guild is not None:
+            self.commands[guild.shard_id] += 1
+
+    def snapshot(self):
+        guilds = Counter(guild.shard_id for guild in self.bot.guilds)
+        latencies = dict(self.bot.latencies)
+        shards = sorted(set(self.bot.shards) | set(guilds))
+        return {
+            "worker": self.worker_id,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "shards": {
+                str(shard): {
+                    "guilds": guilds[shard],
+                    "latency_ms": round(latencies[shard] * 1000, 1)
+                    if math.isfinite(latencies.get(shard, math.inf)) else None,
+                    "commands": self.commands[shard],
+                } for shard in shards
+            },
+        }
+
+    def write(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = status_path(self.worker_id, self.directory)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    async def _run(self):
+        while True:
+            try:
+                self.write()
+            except OSError as e:
+                print(f"⚠️ Failed to write shard status: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,164 @@
+# skill_check.py
+import json
+import os
+import re
+from collections import OrderedDict
+from rules import RULES_PATH, keyword_pattern
+
+SKILL_CHECK_CACHE_SIZE = int(os.getenv("SKILL_CHECK_CACHE_SIZE", "10000"))
+
+# Quoted speech is what the character says, not what they do.
+_QUOTED = re.compile(r"\"[^\"]*\"|“[^”]*”")
+_CLAUSE_BREAK = re.compile(r"[.!?;:,]+|\b(?:and|then|but|so|before|after|while)\b", re.IGNORECASE)
+# "I", "I'll", "I try to", "let me"... Longest forms first so "I" doesn't stop short of "I'll".
+_FIRST_PERSON = re.compile(
+    r"(?:i['’]m going to|i am going to|i['’]ll|i['’]d like to|i will|i shall|let me|i)"
+    r"(?:\s+(?:try|attempt|want|decide|begin|start|need|mean|plan|prepare|go on|get ready)\s+to)?\s+",
+    re.IGNORECASE
+)
+# A clause opening with one of these has someone else as its subject.
+_OTHER_SUBJECT = re.compile(
+    r"(?:the|a|an|he|she|they|we|you|it|his|her|their|its|my|our|your|this|that|these|those|someone|everyone)\b",
+    re.IGNORECASE
+)
+_ADVERBS = r"(?:(?:\w+ly|also|just|now|then)\s+)*"
+
+
+class Action:
+    """An action class from the "actions" section of rules.json.
+
+    `verbs` are what the player says they do ("cast a spell"). A character
+    can attempt the action with any one of the listed classes, skills or
+    passives; an action that lists none is open to all. `means` maps another
+    action to phrases that say the player is doing this one through it
+    ("pick the lock with a spell" is spellcasting, not lockpicking).
+    """
+
+    __slots__ = ("name", "verbs", "classes", "skills", "passives", "means", "reason")
+
+    def __init__(self, name, verbs, classes=(), skills=(), passives=(), means=None, reason=""):
+        self.name = name
+        self.verbs = tuple(v.casefold() for v in verbs)
+        self.classes = frozenset(c.casefold() for c in classes)
+        self.skills = frozenset(s.casefold() for s in skills)
+        self.passives = frozenset(p.casefold() for p in passives)
+        self.means = {other: tuple(p.casefold() for p in phrases) for other, phrases in (means or {}).items()}
+        self.reason = reason or f"can't attempt {name}"
+
+    def allows(self, char):
+        if not (self.classes or self.skills or self.passives):
+            return True
+        if char.char_class.casefold() in self.classes:
+            return True
+        if any(s.casefold() in self.skills for s in char.skills):
+            return True
+        return any(p.casefold() in self.passives for p in char.passives)
+
+
+def clauses(prompt):
+    """The clauses of `prompt` the player is the subject of, in order.
+
+    A clause counts if it opens with "I ..." or carries the subject over
+    from one that did ("I nock an arrow and shoot"). Each is returned with
+    the first-person lead stripped, so it starts at the verb.
+    """
+    mine = False
+    for clause in _CLAUSE_BREAK.split(_QUOTED.sub(" ", prompt)):
+        clause = clause.strip()
+        if not clause:
+            continue
+        lead = _FIRST_PERSON.match(clause)
+        if lead:
+            mine = True
+            clause = clause[lead.end():]
+        elif _OTHER_SUBJECT.match(clause):
+            mine = False
+        if mine:
+            yield clause
+
+
+class SkillChecker:
+    """Decides locally whether a character can attempt what a prompt describes.
+
+    Only clauses where the player is the one acting are looked at, and only
+    at their verb: "I cast a spell" is spellcasting, while "I dodge the
+    fireball" or "I ask the wizard to teleport us out" are not. Each action
+    found is checked against the character's class, skills and passives.
+    Verdicts are memoized per (player, action class); register `invalidate`
+    with the character repository so they are dropped when that player's
+    character changes.
+    """
+
+    def __init__(self, actions, maxsize=SKILL_CHECK_CACHE_SIZE):
+        self.actions = {action.name: action for action in actions}
+        self._by_verb = {}
+        for action in actions:
+            for verb in action.verbs:
+                self._by_verb.setdefault(verb, action)
+        pattern = keyword_pattern(sorted(self._by_verb))
+        self._verb_at = re.compile(rf"{_ADVERBS}({pattern})\b", re.IGNORECASE) if self._by_verb else None
+        self.maxsize = maxsize
+        self._verdicts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stats = {"checks": 0, "rejected": 0}
+
+    @classmethod
+    def from_file(cls, path=RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([Action(name, **spec) for name, spec in data.get("actions", {}).items()])
+
+    def classify(self, prompt):
+        """Action classes the player performs in `prompt`, in order."""
+        if self._verb_at is None:
+            return []
+        found = {}
+        for clause in clauses(prompt):
+            match = self._verb_at.match(clause)
+            if match is None:
+                continue
+            action = self._by_verb.get(match.group(1).casefold())
+            if action is None:
+                continue
+            folded = clause.casefold()
+            for other, phrases in action.means.items():
+                if other in self.actions and any(p in folded for p in phrases):
+                    action = self.actions[other]
+                    break
+            found.setdefault(action.name, action)
+        return list(found.values())
+
+    def check(self, guild_id, user_id, char, prompt):
+        """The first action in `prompt` that `char` can't attempt, or None.
+
+        Players without a character aren't checked; the DM improvises for them.
+        """
+        if char is None:
+            return None
+        actions = self.classify(prompt)
+        if not actions:
+            return None
+        self.stats["checks"] += 1
+        key = (guild_id, user_id)
+        verdicts = self._verdicts.get(key)
+        if verdicts is None:
+            verdicts = self._verdicts[key] = {}
+            if len(self._verdicts) > self.maxsize:
+                self._verdicts.popitem(last=False)
+        else:
+            self._verdicts.move_to_end(key)
+        for action in actions:
+            allowed = verdicts.get(action.name)
+            if allowed is None:
+                self.misses += 1
+                allowed = verdicts[action.name] = action.allows(char)
+            else:
+                self.hits += 1
+            if not allowed:
+                self.stats["rejected"] += 1
+                return action
+        return None
+
+    def invalidate(self, guild_id, user_id):
+        self._verdicts.pop((guild_id, user_id), None)
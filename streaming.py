@@ -0,0 +1,70 @@
+# streaming.py
+import os
+import time
+
+DISCORD_LIMIT = 2000
+EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+EDIT_EVERY_TOKENS = int(os.getenv("STREAM_EDIT_TOKENS", "40"))
+# Discord allows roughly five edits per five seconds on one message; never go
+# faster than this even when tokens arrive in a burst.
+MIN_EDIT_GAP = 0.5
+
+
+async def stream_reply(destination, chunks, prefix="**DM Reply:** ",
+                       interval=EDIT_INTERVAL, every_tokens=EDIT_EVERY_TOKENS):
+    """Send the first delta as soon as it arrives, then edit in batches.
+
+    `destination` is anything with `send()` (a Context or channel) and
+    `chunks` an async iterator of text deltas, e.g. `LLMClient.stream()`.
+    Replies longer than one Discord message spill into follow-up messages.
+    Returns the full reply text.
+    """
+    parts = []
+    message = None
+    shown = ""        # text of the current message as Discord has it
+    offset = 0        # where the current message starts within the reply
+    pending = 0
+    last_edit = 0.0
+
+    async def flush():
+        nonlocal message, shown, offset, pending, last_edit
+        text = "".join(parts)
+        lead = prefix if offset == 0 else ""
+        body = text[offset:]
+        while len(lead) + len(body) > DISCORD_LIMIT:
+            cut = DISCORD_LIMIT - len(lead)
+            split = body.rfind(" ", 0, cut)
+            cut = split if split > 0 else cut
+            content = lead + body[:cut]
+            if message is None:
+                await destination.send(content)
+            elif content != shown:
+                await message.edit(content=content)
+            message, shown, lead = None, "", ""
+            rest = body[cut:].lstrip()
+            offset += len(body) - len(rest)
+            body = rest
+        content = lead + body.rstrip()
+        # Nothing but the prefix yet (or ever): don't post an empty reply.
+        if body.strip() and content != shown:
+            if message is None:
+                message = await destination.send(content)
+            else:
+                await message.edit(content=content)
+            shown = content
+        pending = 0
+        last_edit = time.monotonic()
+
+    async for delta in chunks:
+        if not parts:
+            delta = delta.lstrip()
+            if not delta:
+                continue
+        parts.append(delta)
+        pending += 1
+        elapsed = time.monotonic() - last_edit
+        if message is None or elapsed >= interval or (pending >= every_tokens and elapsed >= MIN_EDIT_GAP):
+            await flush()
+
+    await flush()
+    return "".join(parts).strip()
@@ -0,0 +1,67 @@
+# summarizer.py
+import asyncio
+import os
+
+SUMMARY_THRESHOLD = int(os.getenv("SUMMARY_THRESHOLD", "20"))
+SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", "8"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+
+SUMMARY_PROMPT = (
+    "You keep the campaign notes for a fantasy roleplay. Rewrite the story so far as one "
+    "compact summary in past tense: places visited, NPCs met, items gained or lost, open "
+    "threads and promises. Keep names exact. No commentary, no headings, under 250 words."
+)
+
+
+class Summarizer:
+    """Folds old quest turns into a persisted "story so far" in the background.
+
+    Once a channel has more than `threshold` unsummarized turns, everything but
+    the newest `keep_recent` is merged into the stored summary. `askdm` then
+    sends the summary plus only the turns after it, so prompt size stays flat
+    over a long campaign.
+    """
+
+    def __init__(self, store, llm, threshold=SUMMARY_THRESHOLD, keep_recent=SUMMARY_KEEP_RECENT):
+        self.store = store
+        self.llm = llm
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self._running = {}
+
+    def schedule(self, guild_id, channel_id):
+        """Start a summarization pass if one is due; never waits for it."""
+        key = (guild_id, channel_id)
+        if key in self._running:
+            return
+        through, _ = self.store.summary(guild_id, channel_id)
+        if self.store.count_turns(guild_id, channel_id, after=through) <= self.threshold:
+            return
+        task = asyncio.create_task(self._summarize(guild_id, channel_id))
+        self._running[key] = task
+        task.add_done_callback(lambda _: self._running.pop(key, None))
+
+    async def _summarize(self, guild_id, channel_id):
+        through, summary = self.store.summary(guild_id, channel_id)
+        turns = self.store.recent_turns(guild_id, channel_id, limit=10_000, after=through)
+        old = turns[:-self.keep_recent] if self.keep_recent else turns
+        if not old:
+            return
+        transcript = "\n\n".join(f"Player: {prompt}\nDM: {reply}" for _, prompt, reply in old)
+        if summary:
+            transcript = f"Story so far:\n{summary}\n\nWhat happened next:\n{transcript}"
+        try:
+            new_summary = await self.llm.complete(
+                [{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": transcript}],
+                max_tokens=SUMMARY_MAX_TOKENS
+            )
+        except Exception as e:
+            # Raw turns are still there; the next reply will retry.
+            print(f"⚠️ Failed to summarize quest history: {e}")
+            return
+        self.store.set_summary(guild_id, channel_id, old[-1][0], new_summary)
+
+    async def close(self):
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
@@ -0,0 +1,85 @@
+# test_character_repo.py
+import pytest
+from character_repo import Character, CharacterRepository, StatBlock, parse_character_log
+
+
+def tess():
+    return Character("Tess Ærindal", "Half-Elf", "Rogue", {"strength": 8, "dexterity": 17},
+                     ["Expertise in Sleight of Hand"], "Wry, quick to laugh 😏", ["lockpicks", "rope"], ["Stealth"])
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CharacterRepository(str(tmp_path / "chars.db"))
+    yield repo
+    repo.close()
+
+
+def test_pack_round_trips():
+    char = tess()
+    again = Character.unpack(char.pack())
+    assert again == char
+    assert again.as_dict() == char.as_dict()
+    assert Character(**char.as_dict()) == char
+
+
+def test_empty_character_round_trips():
+    char = Character("", "Human", "Fighter")
+    assert Character.unpack(char.pack()) == char
+
+
+def test_unpack_rejects_unknown_format():
+    data = bytearray(tess().pack())
+    data[0] = 99
+    with pytest.raises(ValueError, match="unknown character format"):
+        Character.unpack(bytes(data))
+
+
+def test_stat_block_reads_like_a_dict():
+    stats = StatBlock({"dexterity": 14})
+    assert dict(stats) == {"strength": 10, "dexterity": 14, "intelligence": 10}
+    stats["strength"] = 12
+    assert stats["strength"] == 12
+    with pytest.raises(KeyError):
+        stats["charisma"]
+    with pytest.raises(KeyError):
+        stats["charisma"] = 1
+
+
+def test_character_is_slotted_and_interns_repeated_strings():
+    a, b = tess(), tess()
+    assert not hasattr(a, "__dict__")
+    assert a.char_class is b.char_class
+
+
+def test_character_log_round_trips():
+    char = tess()
+    user_id, parsed = parse_character_log(char.log_entry(1234))
+    assert user_id == 1234
+    assert (parsed.name, parsed.race, parsed.char_class) == (char.name, char.race, char.char_class)
+    assert parsed.stats == char.stats
+    assert parsed.passives == char.passives
+
+
+def test_repository_save_get_delete_and_listeners(repo):
+    changes = []
+    repo.listeners.append(lambda guild_id, user_id: changes.append((guild_id, user_id)))
+    assert repo.get(1, 2) is None
+    repo.save(1, 2, tess())
+    assert repo.get(1, 2) == tess()
+    assert repo.get(3, 2) is None
+    assert repo.add_item(1, 2, "torch")
+    assert repo.get(1, 2).inventory == ["lockpicks", "rope", "torch"]
+    assert not repo.add_item(1, 9, "torch")
+    assert repo.delete(1, 2)
+    assert not repo.delete(1, 2)
+    assert repo.get(1, 2) is None
+    assert changes[:3] == [(1, 2), (1, 2), (1, 9)]
+
+
+def test_import_marker(repo):
+    assert not repo.is_imported(1)
+    repo.mark_imported(1)
+    assert repo.is_imported(1)
+    repo.save(2, 5, tess())
+    assert repo.is_imported(2)
@@ -0,0 +1,47 @@
+# test_conversation_store.py
+import pytest
+from conversation_store import ConversationStore, memory_messages
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "turns.db"))
+    yield store
+    store.close()
+
+
+def test_quest_ids_count_up_per_channel(store):
+    assert store.next_quest_id(1, 10) == 1
+    assert store.add_turn(1, 10, "I look around", "A hall.") == 1
+    assert store.add_turn(1, 10, "I open the door", "It creaks.") == 2
+    assert store.add_turn(1, 11, "I sit down", "The chair holds.") == 1
+    assert store.add_turn(2, 10, "I wave", "Nobody waves back.") == 1
+    assert store.next_quest_id(1, 10) == 3
+
+
+def test_recent_turns_are_the_latest_oldest_first(store):
+    for n in range(1, 6):
+        store.add_turn(1, 10, f"prompt {n}", f"reply {n}")
+    assert store.recent_turns(1, 10, limit=2) == [(4, "prompt 4", "reply 4"), (5, "prompt 5", "reply 5")]
+    assert [q for q, _, _ in store.recent_turns(1, 10, after=3)] == [4, 5]
+    assert store.count_turns(1, 10, after=3) == 2
+    assert store.recent_turns(1, 11) == []
+
+
+def test_summary_and_clear(store):
+    assert store.summary(1, 10) == (0, "")
+    store.set_summary(1, 10, 3, "They entered the keep.")
+    store.set_summary(1, 10, 5, "They took the keep.")
+    assert store.summary(1, 10) == (5, "They took the keep.")
+    store.add_turn(1, 10, "I rest", "You sleep.")
+    store.clear(1, 10)
+    assert store.summary(1, 10) == (0, "")
+    assert store.recent_turns(1, 10) == []
+    assert store.add_turn(1, 10, "I wake", "Morning.") == 1
+
+
+def test_memory_messages_alternate_user_and_assistant():
+    assert memory_messages([(1, "I look", "A hall.")]) == [
+        {"role": "user", "content": "I look"},
+        {"role": "assistant", "content": "A hall."},
+    ]
@@ -0,0 +1,136 @@
+# test_dice.py
+import itertools
+import random
+import time
+from collections import Counter
+import pytest
+import dice
+from dice import DiceError, JUDGMENT_BANDS, compile_formula, distribution, register_die, roll
+
+
+@pytest.mark.parametrize("formula, lo, hi", [
+    ("2d6", 2, 12),
+    ("3d4+2", 5, 14),
+    ("1d20-1d4", -3, 19),
+    ("4d6kh3", 3, 18),
+    ("4d6dl1", 3, 18),
+    ("2d20kl1", 1, 20),
+    ("adv", 1, 20),
+    ("dis", 1, 20),
+    ("4dF", -4, 4),
+    ("d%", 1, 100),
+    ("1d10000", 1, 10000),
+])
+def test_rolls_stay_in_range(formula, lo, hi):
+    rng = random.Random(7)
+    rolls = {roll(formula, rng) for _ in range(300)}
+    assert lo <= min(rolls) and max(rolls) <= hi
+
+
+def test_exploding_dice_add_another_roll():
+    rng = random.Random(7)
+    rolls = [roll("1d6!", rng) for _ in range(2000)]
+    assert 6 not in rolls
+    assert max(rolls) > 6
+
+
+def test_keep_drop_take_the_right_dice():
+    class Fixed:
+        def randrange(self, lo, stop):
+            return next(faces)
+
+    faces = iter([1, 6, 3, 4] * 5)
+    assert roll("4d6kh3", Fixed()) == 13
+    assert roll("4d6kl1", Fixed()) == 1
+    assert roll("4d6dh1", Fixed()) == 8
+    assert roll("4d6dl1", Fixed()) == 13
+
+
+def test_plain_dice_do_not_hold_their_faces():
+    assert compile_formula("1d10000").faces is None
+
+
+def test_registered_die_rolls_its_faces():
+    register_die("coin", (0, 1), (1, 3))
+    rng = random.Random(7)
+    rolls = [roll("10d[coin]", rng) for _ in range(200)]
+    assert 0 <= min(rolls) and max(rolls) <= 10
+    assert sum(rolls) / len(rolls) == pytest.approx(7.5, abs=0.5)
+
+
+@pytest.mark.parametrize("formula", [
+    "", "2d", "d6+", "1d6x", "2d6k", "1d1!", "1d[nosuchdie]",
+    f"{dice.MAX_DICE + 1}d6",
+    f"1d{dice.MAX_SIDES + 1}",
+    "1d" + "9" * 5000,
+    "+".join([f"{dice.MAX_DICE // 2}d6"] * 3),
+])
+def test_bad_formula_raises(formula):
+    with pytest.raises(DiceError):
+        roll(formula)
+
+
+def enumerate_pmf(pools, total=sum, const=0):
+    """Brute-force pmf over every face combination of `pools` (a list of face ranges)."""
+    counts = Counter(total(faces) + const for faces in itertools.product(*pools))
+    n = sum(counts.values())
+    return {value: count / n for value, count in counts.items()}
+
+
+def keep(n, high=True):
+    return lambda faces: sum(sorted(faces, reverse=high)[:n])
+
+
+D4, D6, D20 = range(1, 5), range(1, 7), range(1, 21)
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ("2d6", enumerate_pmf([D6] * 2)),
+    ("3d4+2", enumerate_pmf([D4] * 3, const=2)),
+    ("1d20-1d4", enumerate_pmf([D20, D4], total=lambda f: f[0] - f[1])),
+    ("4d6kh3", enumerate_pmf([D6] * 4, total=keep(3))),
+    ("4d6k3", enumerate_pmf([D6] * 4, total=keep(3))),
+    ("4d6dl1", enumerate_pmf([D6] * 4, total=keep(3))),
+    ("4d6dh1", enumerate_pmf([D6] * 4, total=keep(3, high=False))),
+    ("2d20kl1", enumerate_pmf([D20] * 2, total=keep(1, high=False))),
+    ("adv", enumerate_pmf([D20] * 2, total=keep(1))),
+    ("dis", enumerate_pmf([D20] * 2, total=keep(1, high=False))),
+    ("4dF", enumerate_pmf([(-1, 0, 1)] * 4)),
+])
+def test_distribution_matches_enumeration(formula, expected):
+    pmf = distribution(formula).pmf()
+    assert pmf.keys() == expected.keys()
+    for value, p in expected.items():
+        assert pmf[value] == pytest.approx(p)
+
+
+def test_distribution_bounds_and_band_odds():
+    dist = distribution("3d6")
+    assert (dist.lo, dist.hi) == (3, 18)
+    assert dist.mean() == pytest.approx(10.5)
+    odds = dist.band_odds()
+    assert odds.keys() == {name for name, _, _ in JUDGMENT_BANDS}
+    assert sum(odds.values()) == pytest.approx(1.0)
+    assert odds["positive"] == pytest.approx(1 / 216)
+
+
+def test_exploding_distribution():
+    # An exploding d6 averages 3.5 * 6/5.
+    assert distribution("1d6!").mean() == pytest.approx(4.2)
+    assert distribution("3d6!").mean() == pytest.approx(12.6)
+    pmf = distribution("1d6!").pmf()
+    assert 6 not in pmf
+    assert pmf[7] == pytest.approx(1 / 36)
+
+
+def test_weighted_die_distribution():
+    register_die("loaded", (1, 2, 3), (1, 1, 2))
+    assert distribution("1d[loaded]").pmf() == pytest.approx({1: 0.25, 2: 0.25, 3: 0.5})
+
+
+@pytest.mark.parametrize("formula", ["300d100", "100d100", "100d20kh50", "100d20+100d20", "1d100!2"])
+def test_distribution_refuses_large_outcome_spaces_quickly(formula):
+    started = time.monotonic()
+    with pytest.raises(DiceError, match="too many outcomes"):
+        distribution(formula)
+    assert time.monotonic() - started < 1
@@ -0,0 +1,89 @@
+# test_hedging.py
+import asyncio
+import pytest
+from hedging import Hedger
+from llm_client import LLMError
+
+MESSAGES = [{"role": "user", "content": "I look around"}]
+
+
+class FakeLLM:
+    """Each stream() call plays the next script: (delay before first delta, deltas or an exception)."""
+
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def stream(self, messages, **params):
+        delay, result = self.scripts[self.calls]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            for delta in result:
+                yield delta
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+async def collect(hedger):
+    return [delta async for delta in hedger.stream(MESSAGES)]
+
+
+def test_disabled_hedger_passes_through():
+    llm = FakeLLM((0, ["a", "b"]))
+    hedger = Hedger(llm, enabled=False)
+    assert asyncio.run(collect(hedger)) == ["a", "b"]
+    assert hedger.stats["requests"] == 0
+
+
+def test_fast_first_token_is_not_hedged():
+    llm = FakeLLM((0, ["A dusty ", "hall."]))
+    hedger = Hedger(llm, enabled=True, default_delay=1)
+    assert asyncio.run(collect(hedger)) == ["A dusty ", "hall."]
+    assert llm.calls == 1
+    assert hedger.stats["hedged"] == 0
+    assert len(hedger.first_token) == 1
+
+
+def test_slow_first_token_is_hedged_and_the_loser_cancelled():
+    llm = FakeLLM((5, ["slow"]), (0, ["fast ", "reply"]))
+    hedger = Hedger(llm, enabled=True, default_delay=0.05)
+
+    async def go():
+        reply = await asyncio.wait_for(collect(hedger), 2)
+        await asyncio.sleep(0)
+        return reply
+
+    assert asyncio.run(go()) == ["fast ", "reply"]
+    assert llm.calls == 2
+    assert llm.cancelled == 1
+    assert hedger.stats["hedged"] == 1
+    assert hedger.stats["hedge_wins"] == 1
+    assert hedger.stats["wasted_prompt_tokens"] > 0
+    assert hedger.hedge_rate() == 1.0
+
+
+def test_error_on_one_attempt_falls_back_to_the_other():
+    llm = FakeLLM((0.1, LLMError("boom")), (0, ["ok"]))
+    hedger = Hedger(llm, enabled=True, default_delay=0.05)
+    assert asyncio.run(collect(hedger)) == ["ok"]
+
+
+def test_all_attempts_failing_raises():
+    llm = FakeLLM((0.1, LLMError("first")), (0.1, LLMError("second")))
+    hedger = Hedger(llm, enabled=True, default_delay=0.05)
+    with pytest.raises(LLMError):
+        asyncio.run(collect(hedger))
+
+
+def test_error_before_the_deadline_is_not_hedged():
+    llm = FakeLLM((0, LLMError("bad request")))
+    hedger = Hedger(llm, enabled=True, default_delay=1)
+    with pytest.raises(LLMError, match="bad request"):
+        asyncio.run(collect(hedger))
+    assert llm.calls == 1
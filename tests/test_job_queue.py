@@ -0,0 +1,125 @@
+# test_job_queue.py
+import asyncio
+import pytest
+from job_queue import PRIORITY_CURRENT_TURN, PRIORITY_IDLE, GenerationQueue, JobExpired, QueueFull
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def returns(value, delay=0.0, log=None):
+    async def fn():
+        if log is not None:
+            log.append(value)
+        await asyncio.sleep(delay)
+        return value
+    return fn
+
+
+def test_higher_priority_runs_first():
+    async def go():
+        queue = GenerationQueue(workers=1)
+        order = []
+        blocker = queue.submit(returns("blocker", 0.05, order))
+        await asyncio.sleep(0)
+        idle = queue.submit(returns("idle", log=order), PRIORITY_IDLE)
+        turn = queue.submit(returns("turn", log=order), PRIORITY_CURRENT_TURN)
+        assert (turn.position(), idle.position()) == (1, 2)
+        assert await asyncio.gather(blocker, idle, turn) == ["blocker", "idle", "turn"]
+        await queue.close()
+        assert order == ["blocker", "turn", "idle"]
+        assert queue.stats["completed"] == 3
+
+    run(go())
+
+
+def test_full_queue_rejects():
+    async def go():
+        queue = GenerationQueue(workers=1, maxsize=1)
+        running = queue.submit(returns(1, 0.05))
+        await asyncio.sleep(0)
+        queue.submit(returns(2))
+        with pytest.raises(QueueFull):
+            queue.submit(returns(3))
+        await running
+        await queue.close()
+        assert queue.stats["rejected"] == 1
+
+    run(go())
+
+
+def test_deadline_expires_waiting_and_running_jobs():
+    async def go():
+        queue = GenerationQueue(workers=1)
+        slow = queue.submit(returns("slow", 1), deadline=0.05)
+        waiting = queue.submit(returns("waiting"), deadline=0.01)
+        with pytest.raises(JobExpired):
+            await slow
+        with pytest.raises(JobExpired):
+            await waiting
+        await queue.close()
+        assert queue.stats["expired"] == 2
+
+    run(go())
+
+
+def test_failure_is_set_on_the_job_and_the_worker_keeps_going():
+    async def boom():
+        raise RuntimeError("upstream down")
+
+    async def go():
+        queue = GenerationQueue(workers=1)
+        failed = queue.submit(boom)
+        after = queue.submit(returns("ok"))
+        with pytest.raises(RuntimeError, match="upstream down"):
+            await failed
+        assert await after == "ok"
+        await queue.close()
+        assert queue.stats["failed"] == 1
+
+    run(go())
+
+
+def test_cancel_by_key_stops_the_running_job_and_the_worker_survives():
+    async def go():
+        queue = GenerationQueue(workers=1)
+        started = asyncio.Event()
+        stopped = asyncio.Event()
+
+        async def long():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            finally:
+                stopped.set()
+
+        queue.submit(long, key="msg")
+        await started.wait()
+        assert queue.cancel("msg")
+        assert not queue.cancel("msg")
+        await stopped.wait()
+        assert await queue.submit(returns("next")) == "next"
+        await queue.close()
+
+    run(go())
+
+
+def test_close_right_after_cancel_does_not_hang():
+    async def go():
+        queue = GenerationQueue(workers=2)
+        started = asyncio.Event()
+
+        async def long():
+            started.set()
+            await asyncio.sleep(10)
+
+        other = queue.submit(returns("other", 10))
+        queue.submit(long, key="msg")
+        await started.wait()
+        queue.cancel("msg")
+        await queue.close()
+        assert all(task.done() for task in queue._tasks)
+        assert other.future.cancelled()
+
+    run(go())
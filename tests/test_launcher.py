@@ -0,0 +1,21 @@
+# test_launcher.py
+import pytest
+from launcher import shard_ranges, worker_rate
+from rate_limit import parse_rate
+
+
+@pytest.mark.parametrize("shards, workers", [(8, 2), (10, 3), (2, 4), (1, 1)])
+def test_shard_ranges_cover_every_shard_once(shards, workers):
+    ranges = shard_ranges(shards, workers)
+    assert len(ranges) == min(shards, workers)
+    assert sorted(s for r in ranges for s in r) == list(range(shards))
+    assert max(map(len, ranges)) - min(map(len, ranges)) <= 1
+
+
+@pytest.mark.parametrize("spec, workers", [("120/60", 4), ("2/60", 4), ("5/60", 1), ("30/1", 7)])
+def test_worker_rates_add_up_to_the_configured_rate(spec, workers):
+    capacity, per_second = parse_rate(spec)
+    share_capacity, share_rate = parse_rate(worker_rate((capacity, per_second), workers))
+    assert share_rate * workers == pytest.approx(per_second)
+    assert share_capacity >= 1
+    assert share_capacity == pytest.approx(max(1, capacity / workers))
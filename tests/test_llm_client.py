@@ -0,0 +1,92 @@
+# test_llm_client.py
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from llm_client import LLMClient, LLMError, encode_payload
+from model_router import Backend, ModelRouter
+from prompt_prefix import CachedMessage
+
+MESSAGES = [{"role": "user", "content": "I look around"}]
+GATEWAY_PAGE = "<html><body><h1>502 Bad Gateway</h1></body></html>"
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, LLMClient("key", url=str(server.make_url("/v1/chat/completions")))
+
+
+async def complete_against(handler):
+    server, client = await serve(handler)
+    try:
+        return await client.complete(MESSAGES), client
+    finally:
+        await client.close()
+        await server.close()
+
+
+def test_complete_returns_content_and_counts_usage():
+    async def handler(request):
+        body = await request.json()
+        assert body["messages"] == MESSAGES
+        return web.json_response({
+            "choices": [{"message": {"content": "  A dusty hall.\n"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 3},
+        })
+
+    text, client = asyncio.run(complete_against(handler))
+    assert text == "A dusty hall."
+    assert client.stats["prompt_tokens"] == 5
+    assert client.stats["completion_tokens"] == 3
+
+
+@pytest.mark.parametrize("status, body, match", [
+    (502, GATEWAY_PAGE, "HTTP 502: <html>"),
+    (500, '{"error": "overloaded"}', "HTTP 500: overloaded"),
+    (200, GATEWAY_PAGE, "not JSON"),
+    (200, '{"choices": []}', "unexpected response"),
+])
+def test_complete_raises_llm_error_for_bad_responses(status, body, match):
+    async def handler(request):
+        return web.Response(status=status, text=body, content_type="text/html")
+
+    with pytest.raises(LLMError, match=match):
+        asyncio.run(complete_against(handler))
+
+
+def test_router_fails_over_on_an_html_gateway_error():
+    async def gateway(request):
+        return web.Response(status=502, text=GATEWAY_PAGE, content_type="text/html")
+
+    async def ok(request):
+        return web.json_response({"choices": [{"message": {"content": "ok"}}]})
+
+    async def go():
+        app = web.Application()
+        app.router.add_post("/proxy", gateway)
+        app.router.add_post("/direct", ok)
+        server = TestServer(app)
+        await server.start_server()
+        llm = ModelRouter([Backend(name, LLMClient("key", url=str(server.make_url(f"/{name}"))))
+                           for name in ("proxy", "direct")])
+        try:
+            assert await llm.complete(MESSAGES) == "ok"
+        finally:
+            await llm.close()
+            await server.close()
+        proxy = llm.backends[0]
+        assert llm.stats["failovers"] == 1
+        assert proxy.client.stats["errors"] == 1
+        assert len(proxy.latency) == 1
+
+    asyncio.run(go())
+
+
+def test_encode_payload_reuses_cached_messages():
+    cached = CachedMessage("system", "You are the DM.")
+    payload = encode_payload([cached, MESSAGES[0]], model="m", temperature=0.5)
+    assert payload.startswith('{"model": "m", "temperature": 0.5, "messages": [')
+    assert cached.encoded in payload
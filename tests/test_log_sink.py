@@ -0,0 +1,132 @@
+# test_log_sink.py
+import asyncio
+import os
+import signal
+import pytest
+from lifecycle import run_bot
+from log_sink import LogSink, split_message
+
+
+class RateLimited(Exception):
+    status = 429
+    retry_after = 0.01
+
+
+class Channel:
+    id = 1
+    name = "logs"
+
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = list(fail)
+
+    async def send(self, content):
+        if self.fail:
+            raise self.fail.pop(0)
+        self.sent.append(content)
+
+
+def test_split_message_prefers_newlines():
+    text = "a" * 10 + "\n" + "b" * 10
+    assert list(split_message(text, 15)) == ["a" * 10, "b" * 10]
+    assert list(split_message("c" * 25, 10)) == ["c" * 10, "c" * 10, "c" * 5]
+    assert list(split_message("")) == []
+
+
+def test_entries_within_the_interval_go_out_as_one_message():
+    async def go():
+        sink = LogSink(interval=0.05)
+        channel = Channel()
+        sink.post(channel, "one")
+        sink.post(channel, "two")
+        await asyncio.sleep(0.1)
+        sink.post(channel, "three")
+        await sink.close()
+        assert channel.sent == ["one\n\ntwo", "three"]
+        assert sink.stats["entries"] == 3
+        assert sink.stats["messages"] == 2
+
+    asyncio.run(go())
+
+
+def test_batches_stay_under_the_message_limit():
+    async def go():
+        sink = LogSink(interval=10, max_chars=12)
+        channel = Channel()
+        for entry in ("aaaa", "bbbb", "cccc", "d" * 30):
+            sink.post(channel, entry)
+        await sink.close()
+        assert all(len(message) <= 12 for message in channel.sent)
+        assert "".join(channel.sent).replace("\n", "") == "aaaabbbbcccc" + "d" * 30
+
+    asyncio.run(go())
+
+
+def test_close_flushes_without_waiting_for_the_interval():
+    async def go():
+        sink = LogSink(interval=60)
+        channel = Channel()
+        sink.post(channel, "last words")
+        await asyncio.wait_for(sink.close(), 1)
+        assert channel.sent == ["last words"]
+
+    asyncio.run(go())
+
+
+def test_429s_are_retried_and_other_errors_dropped():
+    async def go():
+        sink = LogSink(interval=0, retries=2)
+        channel = Channel(fail=[RateLimited(), RateLimited()])
+        sink.post(channel, "eventually")
+        await sink.close()
+        assert channel.sent == ["eventually"]
+        assert sink.stats["retries"] == 2
+
+        sink = LogSink(interval=0)
+        channel = Channel(fail=[RuntimeError("Forbidden")])
+        sink.post(channel, "lost")
+        await sink.close()
+        assert channel.sent == []
+        assert sink.stats["dropped"] == 1
+
+    asyncio.run(go())
+
+
+class FakeBot:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.events = []
+        self._closed = False
+
+    async def start(self, token):
+        self.events.append("start")
+        os.kill(os.getpid(), signal.SIGINT)
+        await asyncio.sleep(10)
+
+    def is_closed(self):
+        return self._closed
+
+    async def close(self):
+        self.events.append("close")
+        self._closed = True
+
+
+@pytest.mark.skipif(os.name != "posix", reason="needs POSIX signals")
+def test_run_bot_flushes_the_sink_before_closing_on_sigint():
+    bot = FakeBot()
+    sink = LogSink(interval=60)
+    channel = Channel()
+
+    async def shutdown():
+        sink.post(channel, "queued at shutdown")
+        await sink.close()
+        bot.events.append("shutdown")
+
+    previous = signal.getsignal(signal.SIGINT)
+    try:
+        run_bot(bot, "token", shutdown)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+    assert bot.events == ["start", "shutdown", "close"]
+    assert channel.sent == ["queued at shutdown"]
+    assert bot.loop.is_closed()
@@ -0,0 +1,164 @@
+# test_model_router.py
+import asyncio
+import json
+import time
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import model_router
+from llm_client import LLMClient, LLMError
+from model_router import Backend, ModelRouter
+
+MESSAGES = [{"role": "user", "content": "I look around"}]
+
+
+def reply(text, delay=0.0):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return web.json_response({
+            "choices": [{"message": {"content": text}}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2},
+        })
+    return handler
+
+
+def fail(status=500):
+    async def handler(request):
+        return web.json_response({"error": "boom"}, status=status)
+    return handler
+
+
+def stream(deltas, error=None):
+    async def handler(request):
+        res = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await res.prepare(request)
+        for delta in deltas:
+            await res.write(f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}\n\n".encode())
+        if error:
+            await res.write(f"data: {json.dumps({'error': error})}\n\n".encode())
+        else:
+            await res.write(b"data: [DONE]\n\n")
+        return res
+    return handler
+
+
+async def fake_openai(**handlers):
+    """One local server; each keyword becomes a /<name> completions endpoint."""
+    app = web.Application()
+    calls = []
+    for name, handler in handlers.items():
+        async def counted(request, name=name, handler=handler):
+            calls.append(name)
+            return await handler(request)
+        app.router.add_post(f"/{name}", counted)
+    server = TestServer(app)
+    await server.start_server()
+    return server, calls
+
+
+def router_for(server, *names):
+    return ModelRouter([Backend(name, LLMClient("key", url=str(server.make_url(f"/{name}")), model=f"model-{name}"))
+                        for name in names])
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_complete_fails_over_to_next_backend_on_error():
+    async def go():
+        server, calls = await fake_openai(a=fail(), b=reply("A dusty hall."))
+        llm = router_for(server, "a", "b")
+        try:
+            assert await llm.complete(MESSAGES) == "A dusty hall."
+        finally:
+            await llm.close()
+            await server.close()
+        assert calls == ["a", "b"]
+        assert llm.stats["failovers"] == 1
+        assert llm.backends[1].client.stats["completion_tokens"] == 2
+
+    run(go())
+
+
+def test_complete_races_next_backend_past_deadline(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTER_DEADLINE", 0.05)
+
+    async def go():
+        server, calls = await fake_openai(slow=reply("late", delay=2), fast=reply("A dusty hall."))
+        llm = router_for(server, "slow", "fast")
+        started = time.monotonic()
+        try:
+            assert await llm.complete(MESSAGES) == "A dusty hall."
+        finally:
+            await llm.close()
+            await server.close()
+        assert time.monotonic() - started < 1
+        assert llm.stats["slow_failovers"] == 1
+
+    run(go())
+
+
+def test_complete_raises_when_every_backend_fails():
+    async def go():
+        server, _ = await fake_openai(a=fail(500), b=fail(503))
+        llm = router_for(server, "a", "b")
+        try:
+            with pytest.raises(LLMError, match="a: HTTP 500.*b: HTTP 503"):
+                await llm.complete(MESSAGES)
+        finally:
+            await llm.close()
+            await server.close()
+
+    run(go())
+
+
+def test_stream_fails_over_before_the_first_delta():
+    async def go():
+        server, calls = await fake_openai(a=fail(), b=stream(["A dusty ", "hall."]))
+        llm = router_for(server, "a", "b")
+        try:
+            deltas = [delta async for delta in llm.stream(MESSAGES)]
+        finally:
+            await llm.close()
+            await server.close()
+        assert "".join(deltas) == "A dusty hall."
+        assert calls == ["a", "b"]
+
+    run(go())
+
+
+def test_stream_does_not_fail_over_once_text_was_sent():
+    async def go():
+        server, calls = await fake_openai(a=stream(["A dusty "], error="overloaded"), b=stream(["never"]))
+        llm = router_for(server, "a", "b")
+        deltas = []
+        try:
+            with pytest.raises(LLMError, match="overloaded"):
+                async for delta in llm.stream(MESSAGES):
+                    deltas.append(delta)
+        finally:
+            await llm.close()
+            await server.close()
+        assert deltas == ["A dusty "]
+        assert calls == ["a"]
+
+    run(go())
+
+
+def test_failing_backend_is_tried_last_and_cools_down(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTER_MIN_SAMPLES", 1)
+
+    async def go():
+        server, calls = await fake_openai(a=fail(), b=reply("ok"))
+        llm = router_for(server, "a", "b")
+        try:
+            for _ in range(3):
+                assert await llm.complete(MESSAGES) == "ok"
+        finally:
+            await llm.close()
+            await server.close()
+        assert calls == ["a", "b", "b", "b"]
+        assert not llm.backends[0].healthy(time.monotonic())
+
+    run(go())
@@ -0,0 +1,53 @@
+# test_offload_queue.py
+import pytest
+from offload_queue import OffloadQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = OffloadQueue(str(tmp_path / "jobs.db"), lease=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def job(channel_id, n):
+    return {"channel_id": channel_id, "prompt": f"turn {n}"}
+
+
+def test_claims_by_priority_then_age(queue):
+    low = queue.put(job(1, 1), priority=2)
+    high = queue.put(job(2, 2), priority=0)
+    assert (queue.position(high), queue.position(low)) == (1, 2)
+    assert queue.claim("w")[0] == high
+    assert queue.claim("w")[0] == low
+    assert queue.claim("w") is None
+
+
+def test_one_running_job_per_channel(queue):
+    first = queue.put(job(1, 1), priority=1)
+    second = queue.put(job(1, 2), priority=1)
+    other = queue.put(job(2, 1), priority=1)
+    assert queue.claim("a") == (first, job(1, 1))
+    assert queue.claim("b")[0] == other
+    assert queue.claim("c") is None
+    queue.finish(first)
+    assert queue.claim("c")[0] == second
+
+
+def test_expired_lease_is_retried_then_failed(queue):
+    queue.lease = -1
+    job_id = queue.put(job(1, 1), priority=1)
+    assert queue.claim("a")[0] == job_id
+    assert queue.claim("b")[0] == job_id
+    assert queue.claim("c") is None
+    status, error = queue.conn.execute("SELECT status, error FROM gen_jobs WHERE id = ?", (job_id,)).fetchone()
+    assert (status, error) == ("failed", "worker lease expired")
+
+
+def test_cancel_and_purge(queue):
+    job_id = queue.put(job(1, 1), priority=1, message_id=99)
+    assert queue.cancel_message(99)
+    assert not queue.cancel_message(99)
+    assert queue.depth() == 0
+    queue.purge(older_than=-1)
+    assert queue.conn.execute("SELECT COUNT(*) FROM gen_jobs WHERE id = ?", (job_id,)).fetchone()[0] == 0
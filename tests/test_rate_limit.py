@@ -0,0 +1,83 @@
+# test_rate_limit.py
+import asyncio
+import pytest
+from rate_limit import RateLimiter, TokenBucket, UserBusy, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("5/60") == (5.0, 5 / 60)
+    assert parse_rate("3") == (3.0, 3.0)
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(2, 1.0)
+    now = bucket.stamp
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time(now) == pytest.approx(1.0)
+    assert bucket.wait_time(now + 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 10) == 0
+    assert bucket.tokens == 2
+
+
+def test_check_limits_each_scope_without_spending_the_others():
+    limiter = RateLimiter(user=(2, 1e-9), guild=(3, 1e-9), model=(100, 1e-9))
+    assert limiter.check(1, 10, "m") is None
+    assert limiter.check(1, 10, "m") is None
+    scope, wait = limiter.check(1, 10, "m")
+    assert scope == "user" and wait > 0
+    assert limiter.check(2, 10, "m") is None
+    assert limiter.check(3, 10, "m")[0] == "guild"
+    # The guild rejection left user 3's own bucket untouched.
+    assert limiter.check(3, 11, "m") is None
+    assert limiter.counters["allowed"] == 4
+    assert (limiter.counters["limited_user"], limiter.counters["limited_guild"]) == (1, 1)
+
+
+def test_one_at_a_time_queues_one_and_rejects_the_rest():
+    async def go():
+        limiter = RateLimiter(max_queued=1)
+        order, notices = [], []
+        release = asyncio.Event()
+
+        async def prompt(name):
+            async def on_queued():
+                notices.append(name)
+            try:
+                async with limiter.one_at_a_time(7, on_queued=on_queued):
+                    order.append(name)
+                    if name == "first":
+                        await release.wait()
+            except UserBusy:
+                order.append(f"{name} rejected")
+
+        first = asyncio.create_task(prompt("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(prompt("second"))
+        await asyncio.sleep(0)
+        await prompt("third")
+        release.set()
+        await asyncio.gather(first, second)
+        assert order == ["first", "third rejected", "second"]
+        assert notices == ["second"]
+        assert limiter.counters["queued"] == 1
+        assert limiter.counters["rejected_busy"] == 1
+        assert limiter._running == {}
+
+    asyncio.run(go())
+
+
+def test_other_users_run_in_parallel():
+    async def go():
+        limiter = RateLimiter()
+        entered = {1: asyncio.Event(), 2: asyncio.Event()}
+
+        async def prompt(user_id, other):
+            async with limiter.one_at_a_time(user_id):
+                entered[user_id].set()
+                # Would deadlock if users were serialized with each other.
+                await entered[other].wait()
+
+        await asyncio.wait_for(asyncio.gather(prompt(1, 2), prompt(2, 1)), 1)
+
+    asyncio.run(go())
@@ -0,0 +1,60 @@
+# test_response_cache.py
+from response_cache import ResponseCache, is_observation, normalize_prompt
+
+SYSTEM = {"role": "system", "content": "You are the DM."}
+
+
+def cache(**kwargs):
+    return ResponseCache(enabled=True, **kwargs)
+
+
+def key(c, prompt="I look around.", context=(SYSTEM,), roll=12, channel=2, model="m"):
+    return c.key_for(model, 1, channel, list(context), prompt, roll)
+
+
+def test_normalized_observations_share_a_key():
+    c = cache()
+    assert normalize_prompt("I carefully look around!") == "look around"
+    assert key(c, "I look around.") == key(c, "look around")
+    assert is_observation("Listen at the door")
+    assert not is_observation("I kick the door")
+
+
+def test_key_is_none_when_off_or_not_an_observation():
+    assert ResponseCache(enabled=False).key_for("m", 1, 2, [SYSTEM], "I look around", 12) is None
+    assert key(cache(), "I open the chest") is None
+
+
+def test_key_covers_model_channel_band_and_context():
+    c = cache()
+    base = key(c)
+    assert key(c, model="other") != base
+    assert key(c, channel=3) != base
+    assert key(c, roll=18) != base
+    assert key(c, roll=13) == base
+    turn = [{"role": "user", "content": "I open the chest (Roll: 9)"}, {"role": "assistant", "content": "It creaks."}]
+    assert key(c, context=[SYSTEM, *turn]) != base
+
+
+def test_earlier_observations_do_not_change_the_key():
+    c = cache()
+    looked = [{"role": "user", "content": "I look around (Roll: 12)"}, {"role": "assistant", "content": "A hall."}]
+    assert key(c, context=[SYSTEM, *looked]) == key(c)
+
+
+def test_get_put_ttl_and_lru():
+    c = cache(ttl=60, maxsize=2)
+    a, b, d = key(c, "look around"), key(c, "search the room"), key(c, "listen")
+    c.put(a, "A hall.")
+    c.put(b, "Dust.")
+    assert c.get(a) == "A hall."
+    c.put(d, "Silence.")
+    assert c.get(b) is None
+    assert c.get(a) == "A hall."
+    c.put(None, "ignored")
+    assert c.get(None) is None
+    c.ttl = -1
+    c.put(a, "Stale.")
+    assert c.get(a) is None
+    assert (c.hits, c.misses) == (2, 2)
+
@@ -0,0 +1,70 @@
+# test_rules.py
+import json
+import re
+import pytest
+from character_repo import Character
+from dice import roll
+from rules import Rule, RulesEngine, keyword_pattern
+
+
+def char(skills=(), passives=()):
+    return Character("Tess", "Human", "Rogue", skills=list(skills), passives=list(passives))
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RulesEngine.from_file()
+
+
+@pytest.mark.parametrize("words", [
+    ["pick", "pick the lock", "picket"],
+    ["hand", "sleight of hand", "hands"],
+    ["a.b", "a+b", "(x)"],
+])
+def test_keyword_pattern_matches_exactly_its_words(words):
+    pattern = re.compile(rf"(?:{keyword_pattern(sorted(words))})\Z")
+    for word in words:
+        assert pattern.match(word)
+    for word in ("pic", "sleight", "ab", "x"):
+        assert not pattern.match(word)
+
+
+def test_bonus_for_owned_rules_only(engine):
+    rogue = char(skills=["Stealth"], passives=["Expertise in Sleight of Hand"])
+    total, rules = engine.bonus(rogue, "I sneak up and pick his pocket")
+    assert total == 4
+    assert {rule.name for rule in rules} == {"Stealth", "Expertise in Sleight of Hand"}
+    assert engine.bonus(char(), "I sneak up") == (0, [])
+    assert engine.bonus(None, "I sneak up") == (0, [])
+
+
+def test_keywords_match_at_word_starts_case_insensitively(engine):
+    climber = char(skills=["Athletics"])
+    assert engine.bonus(climber, "CLIMBING the wall")[0] == 2
+    assert engine.bonus(climber, "I upclimb")[0] == 0
+
+
+def test_each_rule_counts_once(engine):
+    thief = char(skills=["Lockpicking"])
+    assert engine.bonus(thief, "I pick the lock, then the other lock")[0] == 2
+
+
+def test_casefold_variants_never_raise(engine):
+    # "ſ" (long s) matches "s" under IGNORECASE; the lookup must cope.
+    assert engine.bonus(char(skills=["Stealth"]), "I ſneak past")[0] == 2
+
+
+def test_negative_bonus_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"passives": {"Clumsy": {"bonus": -2, "keywords": ["climb"]}}}))
+    engine = RulesEngine.from_file(str(path))
+    total, _ = engine.bonus(char(passives=["Clumsy"]), "I climb")
+    assert total == -2
+    # The formula askdm builds from it must still parse.
+    assert 0 <= roll(f"2d6{total:+d}") <= 10
+
+
+def test_empty_engine():
+    engine = RulesEngine([])
+    assert engine.bonus(char(skills=["Stealth"]), "I sneak") == (0, [])
+    assert Rule("x", "skill", 1, ["A"]).keywords == ("a",)
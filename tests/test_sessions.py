@@ -0,0 +1,29 @@
+# test_sessions.py
+import asyncio
+from sessions import SessionRegistry
+
+
+def test_sessions_are_per_guild_channel():
+    sessions = SessionRegistry()
+    a = sessions.get(1, 10)
+    a.members.append("Tess")
+    assert sessions.get(1, 10) is a
+    assert sessions.get(1, 11).members == []
+    assert sessions.get(2, 10).members == []
+    assert sessions.find(3, 10) is None
+    sessions.end(1, 10)
+    assert sessions.find(1, 10) is None
+
+
+def test_idle_sessions_are_dropped_unless_in_use():
+    async def go():
+        sessions = SessionRegistry(idle_timeout=-1)
+        busy = sessions.get(1, 10)
+        async with busy.lock:
+            sessions.get(1, 11)
+            # The locked one sits at the front and stops eviction.
+            assert sessions.find(1, 10) is busy
+        sessions.get(1, 12)
+        assert len(sessions) == 1
+
+    asyncio.run(go())
@@ -0,0 +1,89 @@
+# test_skill_check.py
+import pytest
+from character_repo import Character
+from skill_check import SkillChecker, clauses
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return SkillChecker.from_file()
+
+
+def char(char_class, skills=(), passives=()):
+    return Character("Tess", "Human", char_class, skills=list(skills), passives=list(passives))
+
+
+def blocked(checker, character, prompt):
+    action = checker.check(1, 2, character, prompt)
+    checker.invalidate(1, 2)
+    return action.name if action else None
+
+
+@pytest.mark.parametrize("prompt", [
+    "I dodge the fireball",
+    "I ask the wizard to teleport us out",
+    "I study the teleporter",
+    "I look at the lockpick on the table",
+    "I shout \"cast a spell, quick!\" at the wizard",
+    "The goblin tries to cast a spell and I duck",
+    "I watch the rogue pick the lock",
+    "I nock an arrow and shoot my bow",
+    "I climb the wall",
+])
+def test_fighter_is_not_blocked_by_mentions(checker, prompt):
+    assert blocked(checker, char("Fighter"), prompt) is None
+
+
+@pytest.mark.parametrize("prompt, action", [
+    ("I cast a spell at the goblin", "spellcasting"),
+    ("I'll pick the lock", "lockpicking"),
+    ("I quietly pick the lock", "lockpicking"),
+    ("I try to cast fireball", "spellcasting"),
+    ("I draw my sword and cast a spell", "spellcasting"),
+    ("I pick the lock with a spell", "spellcasting"),
+    ("Let me go into a rage", "rage"),
+])
+def test_fighter_is_blocked_when_acting(checker, prompt, action):
+    assert blocked(checker, char("Fighter"), prompt) == action
+
+
+@pytest.mark.parametrize("character, prompt", [
+    (char("Wizard"), "I cast a spell at the goblin"),
+    (char("Wizard"), "I pick the lock with a spell"),
+    (char("Fighter", skills=["Arcana"]), "I cast fireball"),
+    (char("Rogue"), "I pick the lock"),
+    (char("Fighter", passives=["Expertise in Sleight of Hand"]), "I pick the lock"),
+    (char("Druid"), "I wild shape into a bear"),
+    (char("Ranger"), "I nock an arrow and shoot my bow"),
+])
+def test_allowed_by_class_skill_or_passive(checker, character, prompt):
+    assert blocked(checker, character, prompt) is None
+
+
+def test_no_character_is_never_checked(checker):
+    assert checker.check(1, 2, None, "I cast a spell") is None
+
+
+def test_clauses_follow_the_subject():
+    assert list(clauses("I nock an arrow and shoot, then the orc roars")) == ["nock an arrow", "shoot"]
+
+
+def test_verdicts_are_memoized_until_invalidated():
+    checker = SkillChecker.from_file()
+    fighter = char("Fighter")
+    assert checker.check(1, 2, fighter, "I cast a spell").name == "spellcasting"
+    assert checker.check(1, 2, fighter, "I cast fireball").name == "spellcasting"
+    assert (checker.hits, checker.misses) == (1, 1)
+    # The cached verdict stands until the character changes.
+    assert checker.check(1, 2, char("Wizard"), "I cast a spell").name == "spellcasting"
+    checker.invalidate(1, 2)
+    assert checker.check(1, 2, char("Wizard"), "I cast a spell") is None
+    assert checker.stats == {"checks": 4, "rejected": 3}
+
+
+def test_verdict_cache_is_bounded():
+    checker = SkillChecker.from_file()
+    checker.maxsize = 2
+    for user_id in range(5):
+        checker.check(1, user_id, char("Fighter"), "I cast a spell")
+    assert len(checker._verdicts) == 2
@@ -0,0 +1,79 @@
+# test_streaming.py
+import asyncio
+import streaming
+from streaming import stream_reply
+
+
+class Message:
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+        self.edits = 0
+
+    async def edit(self, content):
+        assert len(content) <= streaming.DISCORD_LIMIT
+        self.content = content
+        self.edits += 1
+
+
+class Channel:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content):
+        assert len(content) <= streaming.DISCORD_LIMIT
+        message = Message(self, content)
+        self.messages.append(message)
+        return message
+
+
+async def deltas(*parts, gap=0.0):
+    for part in parts:
+        await asyncio.sleep(gap)
+        yield part
+
+
+def test_first_delta_is_sent_at_once_and_the_rest_edited_in():
+    async def go():
+        channel = Channel()
+        reply = await stream_reply(channel, deltas("  A dusty", " hall", "."), interval=60, every_tokens=100)
+        assert reply == "A dusty hall."
+        assert [m.content for m in channel.messages] == ["**DM Reply:** A dusty hall."]
+        # One send for the first delta, one edit for the final flush.
+        assert channel.messages[0].edits == 1
+
+    asyncio.run(go())
+
+
+def test_edits_are_batched():
+    async def go():
+        channel = Channel()
+        words = [f"w{i} " for i in range(50)]
+        await stream_reply(channel, deltas(*words), interval=60, every_tokens=10)
+        # Bursts never edit faster than MIN_EDIT_GAP, so only the final flush edits.
+        assert channel.messages[0].edits == 1
+        assert channel.messages[0].content == "**DM Reply:** " + "".join(words).strip()
+
+    asyncio.run(go())
+
+
+def test_long_replies_spill_into_follow_up_messages():
+    async def go():
+        channel = Channel()
+        words = ["word "] * 1000
+        reply = await stream_reply(channel, deltas(*words), interval=0)
+        assert len(channel.messages) == 3
+        assert channel.messages[0].content.startswith("**DM Reply:** word")
+        assert not channel.messages[1].content.startswith("**DM Reply:**")
+        assert " ".join(m.content for m in channel.messages).split()[2:] == reply.split()
+
+    asyncio.run(go())
+
+
+def test_empty_stream_sends_nothing():
+    async def go():
+        channel = Channel()
+        assert await stream_reply(channel, deltas(" ", "")) == ""
+        assert channel.messages == []
+
+    asyncio.run(go())
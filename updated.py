@@ -3,10 +3,12 @@ import os
 import json
 import random
 import nextcord
-import requests
 from nextcord.ext import commands
 from dotenv import load_dotenv
 from datetime import datetime
+from model_router import ModelRouter
+from lifecycle import run_bot
+from sessions import SessionRegistry
 
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
@@ -15,10 +17,10 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 intents = nextcord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
+sessions = SessionRegistry()
+llm = ModelRouter.from_env(OPENROUTER_API_KEY)
 
 characters = {}
-party_members = []
-current_turn = 0
 status_effects = {}
 player_stats = {}
 
@@ -68,38 +70,46 @@ async def deletechar(ctx):
         await ctx.send("You don’t have a character to delete.")
 
 @bot.command()
+@commands.guild_only()
 async def startparty(ctx, *members):
-    global party_members, current_turn
-    party_members = list(members)
-    current_turn = 0
-    if party_members:
-        await ctx.send(f"Party order set: {', '.join(party_members)}\n➡️ It's **{party_members[0]}'s** turn!")
+    session = sessions.get(ctx.guild.id, ctx.channel.id)
+    async with session.lock:
+        session.members = list(members)
+        session.current_turn = 0
+    if members:
+        await ctx.send(f"Party order set: {', '.join(members)}\n➡️ It's **{members[0]}'s** turn!")
     else:
         await ctx.send("You must specify at least one party member.")
 
 @bot.command()
+@commands.guild_only()
 async def nextturn(ctx):
-    global current_turn
-    if not party_members:
-        await ctx.send("No party members set. Use `!startparty` first.")
-        return
-    current_turn = (current_turn + 1) % len(party_members)
-    await ctx.send(f"➡️ It's now **{party_members[current_turn]}'s** turn!")
+    session = sessions.get(ctx.guild.id, ctx.channel.id)
+    async with session.lock:
+        if not session.members:
+            await ctx.send("No party members set. Use `!startparty` first.")
+            return
+        session.current_turn = (session.current_turn + 1) % len(session.members)
+        member = session.members[session.current_turn]
+    await ctx.send(f"➡️ It's now **{member}'s** turn!")
 
 @bot.command()
+@commands.guild_only()
 async def addmember(ctx, member: str):
-    global party_members
-    party_members.append(member)
-    await ctx.send(f"Added {member} to the party. Current order: {', '.join(party_members)}")
+    session = sessions.get(ctx.guild.id, ctx.channel.id)
+    async with session.lock:
+        session.members.append(member)
+        order = ', '.join(session.members)
+    await ctx.send(f"Added {member} to the party. Current order: {order}")
 
 @bot.command()
+@commands.guild_only()
 async def endparty(ctx):
-    global party_members, current_turn
-    party_members = []
-    current_turn = 0
+    sessions.end(ctx.guild.id, ctx.channel.id)
     await ctx.send("Party turn tracking ended.")
 
 @bot.command()
+@commands.guild_only()
 async def askdm(ctx, *, prompt: str):
     user_id = str(ctx.author.id)
     d20_bonus = 0
@@ -144,20 +154,8 @@ async def askdm(ctx, *, prompt: str):
     messages = [{"role": "system", "content": system_prompt}] + memory_messages
     messages.append({"role": "user", "content": f"{char_desc} {prompt} (Roll: {d20})"})
 
-    payload = {
-        "model": "mistralai/mistral-7b-instruct",
-        "messages": messages
-    }
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
     try:
-        res = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload)
-        data = res.json()
-        reply = data['choices'][0]['message']['content'].strip()
+        reply = await llm.complete(messages)
         await ctx.send(f"**DM Reply:** {reply}")
 
         timestamp = datetime.now().strftime("%B %d, %Y – %I:%M %p")
@@ -187,4 +185,7 @@ async def helpme(ctx):
         "`!helpme` - Show this help message"
     )
 
-bot.run(DISCORD_TOKEN)
+async def shutdown():
+    await llm.close()
+
+run_bot(bot, DISCORD_TOKEN, shutdown)